@@ -8,6 +8,75 @@ class Settings(BaseSettings):
     environment: str = "development"
     frontend_url: str = "http://localhost:5173"
 
+    # SQLite engine profile — applied as PRAGMAs on every new connection
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kib: int = 65536
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_temp_store: str = "MEMORY"
+
+    # Connection pool sizing
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 3600
+
+    # Claude generation result cache
+    generation_cache_ttl_hours: int = 24 * 7
+    generation_cache_max_entries: int = 1000
+
+    # Fan-out generation: one Claude call per recipe, run concurrently
+    generation_fanout_max_concurrency: int = 4
+    generation_fanout_deadline_seconds: float = 45.0
+
+    # Recipe import: long text is split into chunks extracted concurrently
+    import_chunk_tokens: int = 6000
+    import_chunk_overlap_tokens: int = 500
+    import_max_concurrency: int = 4
+    extraction_cache_max_entries: int = 500
+
+    # Background jobs: worker count per process, how long a silent running job is
+    # considered alive before another worker picks it up again, and how many times a
+    # job may be claimed before a stale one is failed instead of queued again
+    job_workers: int = 2
+    job_poll_interval_seconds: float = 2.0
+    job_stale_seconds: int = 60
+    job_max_attempts: int = 3
+
+    # Admission control for expensive routes (generate, suggestions, import, backfill):
+    # concurrent requests per route group, waiting requests beyond that, and how long they wait
+    admission_concurrency: dict[str, int] = {"generate": 4, "suggestions": 1, "import": 2, "backfill": 1}
+    admission_queue: dict[str, int] = {}
+    admission_default_concurrency: int = 2
+    admission_max_wait_seconds: float = 10.0
+
+    # Recipe images are fetched in the background after a save, this many at a time
+    image_fetch_concurrency: int = 4
+
+    # Downscaled image variants served to list views: "webp" or "jpeg"
+    image_variant_format: str = "webp"
+
+    # Image garbage collection: how often it runs, and how old an unreferenced file must be
+    image_gc_interval_hours: int = 6
+    image_gc_grace_minutes: int = 60
+
+    # Shared outbound HTTP pool (Pexels, image downloads, URL imports)
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry_seconds: float = 30.0
+    http_timeout_seconds: float = 15.0
+    http_connect_timeout_seconds: float = 5.0
+
+    # Pexels search results, keyed by normalized query; misses are cached too
+    pexels_cache_ttl_hours: int = 24 * 30
+    pexels_cache_max_entries: int = 5000
+
+    # Daily suggestions: pre-generate tomorrow's set within this many hours of midnight
+    suggestions_pregenerate: bool = True
+    suggestions_pregenerate_lead_hours: int = 6
+    suggestions_scheduler_interval_seconds: int = 900
+
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
 
@@ -1,15 +1,78 @@
-from sqlalchemy import create_engine
+import logging
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 from app.config import settings
 
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False},
-)
+logger = logging.getLogger(__name__)
+
+
+def _engine_kwargs(database_url: str) -> dict:
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite":
+        return {
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout,
+            "pool_recycle": settings.db_pool_recycle,
+            "pool_pre_ping": True,
+        }
+
+    kwargs: dict = {
+        "connect_args": {
+            "check_same_thread": False,
+            "timeout": settings.sqlite_busy_timeout_ms / 1000,
+        },
+    }
+    # In-memory databases use a single shared connection; pool sizing doesn't apply
+    if url.database and url.database != ":memory:":
+        kwargs.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    return kwargs
+
+
+engine = create_engine(settings.database_url, **_engine_kwargs(settings.database_url))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+if engine.dialect.name == "sqlite":
+
+    @event.listens_for(engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+            cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+            # Negative cache_size is in KiB rather than pages
+            cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}")
+            cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+            cursor.execute(f"PRAGMA temp_store={settings.sqlite_temp_store}")
+        finally:
+            cursor.close()
+
+
+def log_engine_config() -> None:
+    """Log the effective database configuration, as reported by the database itself."""
+    pool = engine.pool
+    pool_desc = type(pool).__name__
+    if hasattr(pool, "size"):
+        pool_desc += f"(size={pool.size()}, max_overflow={settings.db_max_overflow})"
+    logger.info("Database: %s, pool=%s", engine.url.render_as_string(hide_password=True), pool_desc)
+
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size", "temp_store")
+    with engine.connect() as conn:
+        effective = {p: conn.exec_driver_sql(f"PRAGMA {p}").scalar() for p in pragmas}
+    logger.info("SQLite pragmas: %s", ", ".join(f"{k}={v}" for k, v in effective.items()))
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from pathlib import Path
@@ -10,8 +11,17 @@ from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.config import settings
-from app.database import Base, engine
-from app.routers import import_recipes, ingredients, paprika, recipes, suggestions, tabs
+from app.database import Base, SessionLocal, engine, log_engine_config
+from app.migrations import run_migrations
+from app.routers import import_recipes, ingredients, jobs, paprika, recipes, suggestions, tabs
+from app.services.admission import AdmissionControlMiddleware
+from app.services.image_service import resume_pending_images
+from app.services.image_store import run_image_gc_scheduler
+from app.services.ingredient_service import backfill_recipe_ingredients
+from app.services.job_queue import job_queue
+from app.services.response_cache import ResponseCacheMiddleware
+from app.services.search_service import ensure_search_index
+from app.services.suggestion_service import run_suggestion_scheduler
 
 STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
 UPLOADS_DIR = Path(__file__).resolve().parent.parent / "data" / "uploads"
@@ -22,12 +32,34 @@ UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    log_engine_config()
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    ensure_search_index(engine)
+    db = SessionLocal()
+    try:
+        backfill_recipe_ingredients(db)
+        resume_pending_images(db)
+    finally:
+        db.close()
+
+    job_queue.start()
+    scheduler = None
+    if settings.suggestions_pregenerate and settings.anthropic_api_key:
+        scheduler = asyncio.create_task(run_suggestion_scheduler())
+    image_gc = asyncio.create_task(run_image_gc_scheduler())
     yield
+    image_gc.cancel()
+    if scheduler is not None:
+        scheduler.cancel()
+    await job_queue.stop()
 
 
 app = FastAPI(title="Recipe Finder", version="1.0.0", lifespan=lifespan)
 
+# Added before CORS so they sit inside it and cached/304/429 responses still get CORS headers
+app.add_middleware(ResponseCacheMiddleware)
+app.add_middleware(AdmissionControlMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[settings.frontend_url, "http://localhost:5173", "http://localhost:8099"],
@@ -42,6 +74,7 @@ app.include_router(suggestions.router, prefix="/api")
 app.include_router(paprika.router, prefix="/api")
 app.include_router(import_recipes.router, prefix="/api")
 app.include_router(tabs.router, prefix="/api")
+app.include_router(jobs.router, prefix="/api")
 
 app.mount("/api/uploads", StaticFiles(directory=UPLOADS_DIR), name="uploads")
 
@@ -0,0 +1,139 @@
+"""Versioned schema migrations for databases that predate a model change.
+
+create_all never alters existing tables, so new indexes and constraints go here.
+Migrations must be idempotent. Run on startup or via ``python -m app.migrations [status]``.
+"""
+
+import logging
+from collections.abc import Callable
+from datetime import datetime
+
+from sqlalchemy import Connection, Engine, text
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+
+def _add_hot_path_indexes(conn: Connection) -> None:
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_recipe_tab_recipes_recipe_id "
+        "ON recipe_tab_recipes (recipe_id)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_recipes_created_at_id ON recipes (created_at, id)"
+    ))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_recipes_name ON recipes (name)"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_search_history_searched_at "
+        "ON search_history (searched_at)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_saved_recipes_saved_at_id "
+        "ON saved_recipes (saved_at, id)"
+    ))
+
+
+def _unique_saved_recipe(conn: Connection) -> None:
+    # Racing save/rate requests could insert the same recipe twice; keep the oldest entry
+    conn.execute(text(
+        "DELETE FROM saved_recipes WHERE id NOT IN "
+        "(SELECT MIN(id) FROM saved_recipes GROUP BY recipe_id)"
+    ))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_saved_recipes_recipe_id "
+        "ON saved_recipes (recipe_id)"
+    ))
+
+
+def _add_recipe_image_status(conn: Connection) -> None:
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(recipes)"))}
+    if "image_status" not in columns:
+        conn.execute(text("ALTER TABLE recipes ADD COLUMN image_status VARCHAR(20)"))
+
+
+def _add_recipe_image_variants(conn: Connection) -> None:
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(recipes)"))}
+    if "image_variants" not in columns:
+        conn.execute(text("ALTER TABLE recipes ADD COLUMN image_variants TEXT"))
+
+
+def _add_recipe_ingredients_parsed_at(conn: Connection) -> None:
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(recipes)"))}
+    if "ingredients_parsed_at" not in columns:
+        conn.execute(text("ALTER TABLE recipes ADD COLUMN ingredients_parsed_at DATETIME"))
+    # Recipes that already have parsed lines were processed; the rest are left to the backfill
+    conn.execute(text(
+        "UPDATE recipes SET ingredients_parsed_at = CURRENT_TIMESTAMP "
+        "WHERE ingredients_parsed_at IS NULL "
+        "AND EXISTS (SELECT 1 FROM recipe_ingredients WHERE recipe_ingredients.recipe_id = recipes.id)"
+    ))
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "add hot-path indexes", _add_hot_path_indexes),
+    (2, "unique saved_recipes.recipe_id", _unique_saved_recipe),
+    (3, "add recipes.image_status", _add_recipe_image_status),
+    (4, "add recipes.image_variants", _add_recipe_image_variants),
+    (5, "add recipes.ingredients_parsed_at", _add_recipe_ingredients_parsed_at),
+]
+
+
+def _ensure_version_table(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, applied_at DATETIME NOT NULL)"
+        ))
+
+
+def applied_versions(engine: Engine) -> set[int]:
+    _ensure_version_table(engine)
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def run_migrations(engine: Engine) -> list[int]:
+    """Apply every pending migration in order, each in its own transaction.
+
+    Returns the versions applied by this call.
+    """
+    done = applied_versions(engine)
+    applied = []
+    for version, name, migrate in MIGRATIONS:
+        if version in done:
+            continue
+        logger.info("Applying migration %d: %s", version, name)
+        try:
+            with engine.begin() as conn:
+                migrate(conn)
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                    {"v": version, "n": name, "t": datetime.utcnow()},
+                )
+        except IntegrityError:
+            # Another worker recorded this version first; its DDL is idempotent with ours
+            logger.info("Migration %d already applied by another process", version)
+            continue
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    import sys
+
+    from app.database import Base, engine
+    from app import models  # noqa: F401 — register tables on Base.metadata
+
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    if command == "status":
+        done = applied_versions(engine)
+        for version, name, _ in MIGRATIONS:
+            print(f"{'applied' if version in done else 'pending':8} {version:4} {name}")
+    elif command == "upgrade":
+        Base.metadata.create_all(bind=engine)
+        applied = run_migrations(engine)
+        print(f"Applied {len(applied)} migration(s)" + (f": {applied}" if applied else ""))
+    else:
+        print("usage: python -m app.migrations [upgrade|status]")
+        sys.exit(2)
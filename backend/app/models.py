@@ -1,7 +1,18 @@
 import uuid
 from datetime import date, datetime
 
-from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import (
+    Boolean,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -13,9 +24,10 @@ def generate_uuid() -> str:
 
 class Recipe(Base):
     __tablename__ = "recipes"
+    __table_args__ = (Index("ix_recipes_created_at_id", "created_at", "id"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=generate_uuid)
-    name: Mapped[str] = mapped_column(String(500), nullable=False)
+    name: Mapped[str] = mapped_column(String(500), nullable=False, index=True)
     ingredients: Mapped[str] = mapped_column(Text, default="")
     directions: Mapped[str] = mapped_column(Text, default="")
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -28,6 +40,12 @@ class Recipe(Base):
     categories: Mapped[str | None] = mapped_column(Text, nullable=True)
     nutritional_info: Mapped[str | None] = mapped_column(Text, nullable=True)
     image_url: Mapped[str | None] = mapped_column(String(1000), nullable=True)
+    # "pending" while a background lookup runs, then "ready" or "missing"
+    image_status: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    # JSON {variant name: url} of downscaled copies of image_url
+    image_variants: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Set whenever ingredients are parsed into recipe_ingredients, even into zero lines
+    ingredients_parsed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     difficulty: Mapped[str | None] = mapped_column(String(50), nullable=True)
     cuisine: Mapped[str | None] = mapped_column(String(100), nullable=True)
     ai_generated: Mapped[bool] = mapped_column(Boolean, default=True)
@@ -37,14 +55,40 @@ class Recipe(Base):
     )
 
     saved_entry: Mapped["SavedRecipe | None"] = relationship(back_populates="recipe")
+    parsed_ingredients: Mapped[list["RecipeIngredient"]] = relationship(
+        back_populates="recipe",
+        cascade="all, delete-orphan",
+        order_by="RecipeIngredient.position",
+    )
+
+
+class RecipeIngredient(Base):
+    """One parsed line of Recipe.ingredients, kept in sync at write time."""
+
+    __tablename__ = "recipe_ingredients"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    recipe_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("recipes.id"), nullable=False, index=True
+    )
+    position: Mapped[int] = mapped_column(Integer, default=0)
+    raw: Mapped[str] = mapped_column(Text, nullable=False)
+    quantity: Mapped[float | None] = mapped_column(Float, nullable=True)
+    quantity_max: Mapped[float | None] = mapped_column(Float, nullable=True)
+    unit: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    name: Mapped[str] = mapped_column(String(200), nullable=False, index=True)
+    note: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    recipe: Mapped["Recipe"] = relationship(back_populates="parsed_ingredients")
 
 
 class SavedRecipe(Base):
     __tablename__ = "saved_recipes"
+    __table_args__ = (Index("ix_saved_recipes_saved_at_id", "saved_at", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     recipe_id: Mapped[str] = mapped_column(
-        String(36), ForeignKey("recipes.id"), nullable=False
+        String(36), ForeignKey("recipes.id"), nullable=False, unique=True, index=True
     )
     rating: Mapped[int | None] = mapped_column(Integer, nullable=True)
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -61,7 +105,7 @@ class SearchHistory(Base):
     recipe_id: Mapped[str | None] = mapped_column(
         String(36), ForeignKey("recipes.id"), nullable=True
     )
-    searched_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    searched_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
 
 
 class IngredientFrequency(Base):
@@ -73,6 +117,122 @@ class IngredientFrequency(Base):
     last_searched: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 
+class GenerationCacheEntry(Base):
+    """A Claude recipe generation, keyed by a hash of everything that shaped the prompt."""
+
+    __tablename__ = "generation_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    response: Mapped[str] = mapped_column(Text, nullable=False)
+    recipe_ids: Mapped[str | None] = mapped_column(Text, nullable=True)
+    hits: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_used_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+
+class ExtractionCacheEntry(Base):
+    """Claude's recipe extraction of one source text, keyed by content hash, prompt version and model."""
+
+    __tablename__ = "extraction_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    source: Mapped[str | None] = mapped_column(String(2000), nullable=True)
+    response: Mapped[str] = mapped_column(Text, nullable=False)
+    hits: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_used_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+
+class ImportSource(Base):
+    """Last fetched copy of an imported URL, with its validators for conditional refetch."""
+
+    __tablename__ = "import_sources"
+
+    url: Mapped[str] = mapped_column(String(2000), primary_key=True)
+    etag: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    last_modified: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    fetched_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class PexelsSearch(Base):
+    """A Pexels photo search result, keyed by normalized query so similar recipe names share it."""
+
+    __tablename__ = "pexels_searches"
+
+    query: Mapped[str] = mapped_column(String(500), primary_key=True)
+    photo_url: Mapped[str | None] = mapped_column(String(1000), nullable=True)
+    hits: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    last_used_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class ImageBlob(Base):
+    """A stored image file, named by its SHA-256, and how many recipes reference it."""
+
+    __tablename__ = "image_blobs"
+
+    filename: Mapped[str] = mapped_column(String(100), primary_key=True)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    size_bytes: Mapped[int] = mapped_column(Integer, default=0)
+    refcount: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Set when refcount drops to zero; the GC removes the file after a grace period
+    unreferenced_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+class Job(Base):
+    """A unit of background work, persisted so it survives restarts and can be polled."""
+
+    __tablename__ = "jobs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    kind: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="queued", index=True)
+    payload: Mapped[str] = mapped_column(Text, nullable=False, default="{}")
+    checkpoint: Mapped[str | None] = mapped_column(Text, nullable=True)
+    result: Mapped[str | None] = mapped_column(Text, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    progress_done: Mapped[int] = mapped_column(Integer, default=0)
+    progress_total: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, default=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+class LlmCall(Base):
+    """Token, cache and latency accounting for one Claude call made through the LLM gateway."""
+
+    __tablename__ = "llm_calls"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    endpoint: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
+    model: Mapped[str] = mapped_column(String(100), nullable=False)
+    input_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    output_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    cache_creation_input_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    cache_read_input_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    latency_ms: Mapped[int] = mapped_column(Integer, default=0)
+    stop_reason: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+
+class Lease(Base):
+    """Named, expiring lock shared by every worker on the database."""
+
+    __tablename__ = "leases"
+
+    name: Mapped[str] = mapped_column(String(200), primary_key=True)
+    owner: Mapped[str] = mapped_column(String(64), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
 class DailySuggestion(Base):
     __tablename__ = "daily_suggestions"
 
@@ -102,6 +262,8 @@ class RecipeTabRecipe(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     tab_id: Mapped[int] = mapped_column(Integer, ForeignKey("recipe_tabs.id"), nullable=False)
-    recipe_id: Mapped[str] = mapped_column(String(36), ForeignKey("recipes.id"), nullable=False)
+    recipe_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("recipes.id"), nullable=False, index=True
+    )
 
     tab: Mapped["RecipeTab"] = relationship(back_populates="tab_recipes")
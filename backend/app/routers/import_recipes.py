@@ -1,9 +1,15 @@
+from pathlib import Path
+
 from fastapi import APIRouter, Depends, HTTPException, UploadFile
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.services.import_service import import_from_text, import_from_url
+from app.schemas import JobOut
+from app.services import job_handlers  # noqa: F401 — registers the job kinds
+from app.services.import_service import import_from_text, import_from_url, summarize_import
+from app.services.job_queue import get_job, new_job_id, save_upload, submit
+from app.services.serialization import job_to_out
 
 router = APIRouter(tags=["import"])
 
@@ -15,7 +21,7 @@ class UrlImportRequest(BaseModel):
 @router.post("/import/url")
 async def import_url(req: UrlImportRequest, db: Session = Depends(get_db)):
     try:
-        result = import_from_url(db, req.url)
+        result = await import_from_url(db, req.url)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -27,6 +33,7 @@ async def import_url(req: UrlImportRequest, db: Session = Depends(get_db)):
 async def import_files(files: list[UploadFile], db: Session = Depends(get_db)):
     total_imported = 0
     total_skipped = 0
+    total_failed_chunks = 0
     errors = []
 
     for file in files:
@@ -41,14 +48,40 @@ async def import_files(files: list[UploadFile], db: Session = Depends(get_db)):
             continue
 
         try:
-            result = import_from_text(db, file.filename, content)
+            result = await import_from_text(db, file.filename, content)
             total_imported += result["imported"]
             total_skipped += result["skipped"]
+            total_failed_chunks += result.get("failed_chunks", 0)
         except Exception as e:
             errors.append(f"Error processing '{file.filename}': {e}")
 
-    message = f"Imported {total_imported} recipes, skipped {total_skipped} duplicates"
-    if errors:
-        message += f". Errors: {'; '.join(errors)}"
+    message = summarize_import(total_imported, total_skipped, errors, total_failed_chunks)
+    return {
+        "imported": total_imported,
+        "skipped": total_skipped,
+        "failed_chunks": total_failed_chunks,
+        "message": message,
+    }
+
+
+@router.post("/import/url/async", response_model=JobOut, status_code=202)
+def import_url_async(req: UrlImportRequest, db: Session = Depends(get_db)):
+    """Like /import/url, but returns a job to poll at /jobs/{id} instead of waiting."""
+    return job_to_out(get_job(db, submit("import_url", {"url": req.url})))
+
+
+@router.post("/import/files/async", response_model=JobOut, status_code=202)
+async def import_files_async(files: list[UploadFile], db: Session = Depends(get_db)):
+    """Like /import/files, but stores the uploads and imports them in a background job."""
+    job_id = new_job_id()
+    stored = []
+    errors = []
+    for i, file in enumerate(files):
+        if not file.filename or not file.filename.endswith((".txt", ".md")):
+            errors.append(f"Skipped '{file.filename}': must be .txt or .md")
+            continue
+        path = await save_upload(job_id, file, f"{i}_{Path(file.filename).name}")
+        stored.append({"name": file.filename, "path": path})
 
-    return {"imported": total_imported, "skipped": total_skipped, "message": message}
+    submit("import_files", {"files": stored, "errors": errors}, job_id=job_id)
+    return job_to_out(get_job(db, job_id))
@@ -1,21 +1,65 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator
+
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.models import Recipe, SavedRecipe
-from app.schemas import GenerateRequest, GenerateResponse, RecipeOut
-from app.services.claude_service import generate_recipes, normalize_recipe
-from app.services.import_service import search_recipe_image
+from app.database import SessionLocal, get_db
+from app.models import Recipe
+from app.schemas import (
+    GenerateRequest,
+    GenerateResponse,
+    MatchRequest,
+    MatchResponse,
+    RecipeMatchOut,
+    RecipeOut,
+)
+from app.services.claude_service import (
+    fan_out_recipes,
+    generate_recipes,
+    generate_recipes_fanout,
+    normalize_recipe,
+    stream_recipes,
+)
+from app.services import generation_cache
+from app.services.image_service import fetch_image, mark_pending, schedule_image_fetches
 from app.services.learning_service import get_user_preferences, track_search
+from app.services.matching_service import match_recipes
+from app.services.serialization import recipe_to_out, recipes_to_out
 
 router = APIRouter(tags=["ingredients"])
 
+# With prefer_library, skip generation when this many library recipes are this close
+LIBRARY_MATCH_COUNT = 3
+LIBRARY_MATCH_MAX_MISSING = 1
+
+MAX_GENERATE_COUNT = 10
+
+
+def _generated_recipe(recipe_data: dict) -> Recipe:
+    recipe_data = normalize_recipe(recipe_data)
+    return Recipe(
+        name=recipe_data["name"],
+        ingredients=recipe_data.get("ingredients", ""),
+        directions=recipe_data.get("directions", ""),
+        description=recipe_data.get("description"),
+        prep_time=recipe_data.get("prep_time"),
+        cook_time=recipe_data.get("cook_time"),
+        total_time=recipe_data.get("total_time"),
+        servings=recipe_data.get("servings"),
+        categories=recipe_data.get("categories"),
+        difficulty=recipe_data.get("difficulty"),
+        cuisine=recipe_data.get("cuisine"),
+        nutritional_info=recipe_data.get("nutritional_info"),
+        source="AI Generated",
+        ai_generated=True,
+    )
 
-@router.post("/recipes/generate", response_model=GenerateResponse)
-def generate_recipes_endpoint(request: GenerateRequest, db: Session = Depends(get_db)):
-    if not request.ingredients:
-        raise HTTPException(status_code=400, detail="At least one ingredient is required")
 
+def _build_preferences(db: Session, request: GenerateRequest) -> dict:
     preferences = get_user_preferences(db)
     if request.dietary_preferences:
         preferences["dietary_preferences"] = request.dietary_preferences
@@ -23,70 +67,205 @@ def generate_recipes_endpoint(request: GenerateRequest, db: Session = Depends(ge
         preferences["cuisine_preference"] = request.cuisine_preference
     if request.max_cook_time:
         preferences["max_cook_time"] = request.max_cook_time
+    return preferences
 
-    try:
-        raw_recipes = generate_recipes(request.ingredients, preferences)
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"Recipe generation failed: {e}")
 
+def _library_matches(db: Session, ingredients: list[str]) -> list[RecipeOut] | None:
+    """Close-enough library recipes for prefer_library, or None if there aren't enough."""
+    matches = match_recipes(db, ingredients, LIBRARY_MATCH_COUNT, LIBRARY_MATCH_MAX_MISSING)
+    if len(matches) < LIBRARY_MATCH_COUNT:
+        return None
+    return recipes_to_out(db, [recipe for recipe, _ in matches])
+
+
+def _save_generated_recipes(
+    db: Session, raw_recipes: list[dict], ingredients: list[str], cache_key: str, count: int
+) -> GenerateResponse:
     saved_recipes = []
     for recipe_data in raw_recipes:
-        recipe_data = normalize_recipe(recipe_data)
-        recipe = Recipe(
-            name=recipe_data["name"],
-            ingredients=recipe_data.get("ingredients", ""),
-            directions=recipe_data.get("directions", ""),
-            description=recipe_data.get("description"),
-            prep_time=recipe_data.get("prep_time"),
-            cook_time=recipe_data.get("cook_time"),
-            total_time=recipe_data.get("total_time"),
-            servings=recipe_data.get("servings"),
-            categories=recipe_data.get("categories"),
-            difficulty=recipe_data.get("difficulty"),
-            cuisine=recipe_data.get("cuisine"),
-            nutritional_info=recipe_data.get("nutritional_info"),
-            source="AI Generated",
-            ai_generated=True,
-        )
+        recipe = _generated_recipe(recipe_data)
+        mark_pending(recipe)
         db.add(recipe)
-        db.flush()
+        saved_recipes.append(recipe)
 
-        image_path, _ = search_recipe_image(recipe.name, recipe.id)
-        if image_path:
-            recipe.image_url = image_path
+    db.commit()
+    # Images arrive in the background; clients poll /recipes/images for them
+    schedule_image_fetches(saved_recipes)
 
-        saved_recipes.append(recipe)
+    # A fan-out cut short by its deadline is not worth replaying
+    if len(raw_recipes) >= count:
+        generation_cache.store(db, cache_key, raw_recipes, [r.id for r in saved_recipes])
+    track_search(db, ingredients)
+
+    return GenerateResponse(recipes=recipes_to_out(db, saved_recipes))
+
+
+def _cached_generation(db: Session, cache_key: str, ingredients: list[str]) -> GenerateResponse | None:
+    hit = generation_cache.lookup(db, cache_key)
+    if hit is None:
+        return None
+    raw_recipes, recipes = hit
+    if recipes is None:
+        # Recipes from the cached generation were deleted; recreate them without a Claude call
+        response = _save_generated_recipes(db, raw_recipes, ingredients, cache_key, len(raw_recipes))
+    else:
+        track_search(db, ingredients)
+        response = GenerateResponse(recipes=recipes_to_out(db, recipes))
+    response.cached = True
+    return response
+
+
+def _validate_generate_request(request: GenerateRequest) -> None:
+    if not request.ingredients:
+        raise HTTPException(status_code=400, detail="At least one ingredient is required")
+    if not 1 <= request.count <= MAX_GENERATE_COUNT:
+        raise HTTPException(status_code=400, detail=f"count must be between 1 and {MAX_GENERATE_COUNT}")
+
+
+@router.post("/recipes/generate", response_model=GenerateResponse)
+async def generate_recipes_endpoint(request: GenerateRequest, db: Session = Depends(get_db)):
+    _validate_generate_request(request)
+
+    if request.prefer_library:
+        library = await run_in_threadpool(_library_matches, db, request.ingredients)
+        if library:
+            return GenerateResponse(recipes=library, from_library=True)
 
+    preferences = await run_in_threadpool(_build_preferences, db, request)
+    cache_key = generation_cache.generation_key(
+        request.ingredients, preferences, request.count, request.fan_out
+    )
+    if not request.bypass_cache:
+        cached = await run_in_threadpool(_cached_generation, db, cache_key, request.ingredients)
+        if cached:
+            return cached
+
+    generate = generate_recipes_fanout if request.fan_out else generate_recipes
+    try:
+        raw_recipes = await generate(request.ingredients, preferences, request.count)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Recipe generation failed: {e}")
+
+    # Persistence is blocking; keep it off the loop
+    return await run_in_threadpool(
+        _save_generated_recipes, db, raw_recipes, request.ingredients, cache_key, request.count
+    )
+
+
+def _persist_streamed_recipe(db: Session, recipe_data: dict) -> RecipeOut:
+    recipe = _generated_recipe(recipe_data)
+    mark_pending(recipe)
+    db.add(recipe)
     db.commit()
+    return recipe_to_out(db, recipe)
+
+
+def _ndjson(event: dict) -> str:
+    return json.dumps(event, default=str) + "\n"
+
+
+async def _generate_events(request: GenerateRequest) -> AsyncIterator[str]:
+    """Emit recipe events as Claude finishes each one, then image events as lookups complete.
+
+    Events: {"type": "recipe", "recipe": ...}, {"type": "image", "recipe_id", "image_url"},
+    {"type": "error", "detail"} and a final {"type": "done", "count"}.
+    """
+    db = SessionLocal()
+    queue: asyncio.Queue[dict | None] = asyncio.Queue()
+    image_tasks: list[asyncio.Task] = []
+    producer: asyncio.Task | None = None
+
+    async def attach_image(recipe: RecipeOut) -> None:
+        # fetch_image uses its own session, so it can run alongside the stream
+        image_url = await run_in_threadpool(fetch_image, recipe.id, recipe.name)
+        await queue.put({"type": "image", "recipe_id": recipe.id, "image_url": image_url})
 
-    track_search(db, request.ingredients)
-
-    recipe_outs = []
-    for recipe in saved_recipes:
-        saved = db.query(SavedRecipe).filter(SavedRecipe.recipe_id == recipe.id).first()
-        recipe_outs.append(
-            RecipeOut(
-                id=recipe.id,
-                name=recipe.name,
-                ingredients=recipe.ingredients,
-                directions=recipe.directions,
-                description=recipe.description,
-                notes=recipe.notes,
-                source=recipe.source,
-                prep_time=recipe.prep_time,
-                cook_time=recipe.cook_time,
-                total_time=recipe.total_time,
-                servings=recipe.servings,
-                categories=recipe.categories,
-                nutritional_info=recipe.nutritional_info,
-                image_url=recipe.image_url,
-                difficulty=recipe.difficulty,
-                cuisine=recipe.cuisine,
-                ai_generated=recipe.ai_generated,
-                created_at=recipe.created_at,
-                is_saved=saved is not None,
-                rating=saved.rating if saved else None,
+    async def produce() -> None:
+        try:
+            if request.prefer_library:
+                library = await run_in_threadpool(_library_matches, db, request.ingredients)
+                if library:
+                    for recipe in library:
+                        await queue.put({"type": "recipe", "recipe": recipe.model_dump(), "from_library": True})
+                    return
+
+            preferences = await run_in_threadpool(_build_preferences, db, request)
+            cache_key = generation_cache.generation_key(
+                request.ingredients, preferences, request.count, request.fan_out
             )
-        )
+            if not request.bypass_cache:
+                cached = await run_in_threadpool(_cached_generation, db, cache_key, request.ingredients)
+                if cached:
+                    for recipe in cached.recipes:
+                        await queue.put({"type": "recipe", "recipe": recipe.model_dump(), "cached": True})
+                    return
+
+            raw_recipes = []
+            saved_ids = []
+            stream = fan_out_recipes if request.fan_out else stream_recipes
+            async for recipe_data in stream(request.ingredients, preferences, request.count):
+                raw_recipes.append(dict(recipe_data))
+                recipe = await run_in_threadpool(_persist_streamed_recipe, db, recipe_data)
+                saved_ids.append(recipe.id)
+                await queue.put({"type": "recipe", "recipe": recipe.model_dump()})
+                image_tasks.append(asyncio.create_task(attach_image(recipe)))
+
+            if len(raw_recipes) >= request.count:
+                await run_in_threadpool(generation_cache.store, db, cache_key, raw_recipes, saved_ids)
+            await run_in_threadpool(track_search, db, request.ingredients)
+            await asyncio.gather(*image_tasks)
+        except Exception as e:
+            await queue.put({"type": "error", "detail": f"Recipe generation failed: {e}"})
+        finally:
+            await queue.put(None)
+
+    count = 0
+    try:
+        producer = asyncio.create_task(produce())
+        while (event := await queue.get()) is not None:
+            if event["type"] == "recipe":
+                count += 1
+            yield _ndjson(event)
+        yield _ndjson({"type": "done", "count": count})
+    finally:
+        # Client went away or we finished — don't leave work running against a closed session.
+        # Cancelling doesn't interrupt a threadpool call already using db, so wait for them
+        tasks = [task for task in (producer, *image_tasks) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        db.close()
+
+
+@router.post("/recipes/generate/stream")
+async def generate_recipes_stream_endpoint(request: GenerateRequest):
+    """Streaming variant of /recipes/generate, as newline-delimited JSON events."""
+    _validate_generate_request(request)
 
-    return GenerateResponse(recipes=recipe_outs)
+    return StreamingResponse(
+        _generate_events(request),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/recipes/match", response_model=MatchResponse)
+def match_recipes_endpoint(request: MatchRequest, db: Session = Depends(get_db)):
+    """Rank library recipes by how well the given ingredients cover them — no Claude call."""
+    if not request.ingredients:
+        raise HTTPException(status_code=400, detail="At least one ingredient is required")
+
+    matches = match_recipes(db, request.ingredients, request.limit, request.max_missing)
+    recipe_outs = recipes_to_out(db, [recipe for recipe, _ in matches])
+    return MatchResponse(
+        matches=[
+            RecipeMatchOut(
+                recipe=out,
+                coverage=round(info["coverage"], 3),
+                matched_count=info["matched_count"],
+                missing_count=info["missing_count"],
+                missing=info["missing"],
+            )
+            for out, (_, info) in zip(recipe_outs, matches)
+        ]
+    )
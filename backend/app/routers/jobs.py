@@ -0,0 +1,95 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, get_db
+from app.schemas import JobOut, JobSubmit
+from app.services import job_handlers  # noqa: F401 — registers the job kinds
+from app.services.job_queue import (
+    TERMINAL_STATUSES,
+    get_job,
+    job_kinds,
+    list_jobs,
+    request_cancel,
+    submit,
+)
+from app.services.serialization import job_to_out
+
+router = APIRouter(tags=["jobs"])
+
+# Kinds whose inputs are uploads; they are submitted through their own endpoints
+_UPLOAD_KINDS = {"import_files", "paprika_import"}
+
+EVENT_POLL_SECONDS = 0.5
+
+
+@router.get("/jobs", response_model=list[JobOut])
+def list_jobs_endpoint(status: str | None = None, limit: int = 50, db: Session = Depends(get_db)):
+    return [job_to_out(job) for job in list_jobs(db, status, min(limit, 200))]
+
+
+@router.post("/jobs", response_model=JobOut, status_code=202)
+def submit_job(request: JobSubmit, db: Session = Depends(get_db)):
+    if request.kind in _UPLOAD_KINDS or request.kind not in job_kinds():
+        raise HTTPException(status_code=400, detail=f"Unknown job kind: {request.kind}")
+    job_id = submit(request.kind, request.payload)
+    return job_to_out(get_job(db, job_id))
+
+
+@router.get("/jobs/{job_id}", response_model=JobOut)
+def get_job_endpoint(job_id: str, db: Session = Depends(get_db)):
+    job = get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_out(job)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobOut)
+def cancel_job(job_id: str, db: Session = Depends(get_db)):
+    job = get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not request_cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    db.expire_all()
+    return job_to_out(get_job(db, job_id))
+
+
+def _snapshot(job_id: str) -> JobOut | None:
+    db = SessionLocal()
+    try:
+        job = get_job(db, job_id)
+        return job_to_out(job) if job else None
+    finally:
+        db.close()
+
+
+async def _job_events(job_id: str) -> AsyncIterator[str]:
+    last = None
+    while True:
+        out = await run_in_threadpool(_snapshot, job_id)
+        if out is None:
+            return
+        line = out.model_dump_json()
+        if line != last:
+            yield line + "\n"
+            last = line
+        if out.status in TERMINAL_STATUSES:
+            return
+        await asyncio.sleep(EVENT_POLL_SECONDS)
+
+
+@router.get("/jobs/{job_id}/events")
+def job_events(job_id: str, db: Session = Depends(get_db)):
+    """The job's state as newline-delimited JSON, one line per change, until it finishes."""
+    if not get_job(db, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        _job_events(job_id),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
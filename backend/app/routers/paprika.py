@@ -1,10 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import Response
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models import Recipe, SavedRecipe
+from app.schemas import JobOut
+from app.services import job_handlers  # noqa: F401 — registers the job kinds
+from app.services.job_queue import get_job, new_job_id, save_upload, submit
 from app.services.paprika_service import export_markdown, export_paprika, export_single_markdown, import_paprika
+from app.services.serialization import job_to_out
 
 router = APIRouter(tags=["paprika"])
 
@@ -16,7 +21,7 @@ async def import_paprika_file(file: UploadFile, db: Session = Depends(get_db)):
 
     contents = await file.read()
     try:
-        result = import_paprika(db, contents)
+        result = await run_in_threadpool(import_paprika, db, contents)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to import: {e}")
 
@@ -27,6 +32,18 @@ async def import_paprika_file(file: UploadFile, db: Session = Depends(get_db)):
     }
 
 
+@router.post("/paprika/import/async", response_model=JobOut, status_code=202)
+async def import_paprika_file_async(file: UploadFile, db: Session = Depends(get_db)):
+    """Like /paprika/import, but returns a job to poll at /jobs/{id} instead of waiting."""
+    if not file.filename or not file.filename.endswith(".paprikarecipes"):
+        raise HTTPException(status_code=400, detail="File must be a .paprikarecipes file")
+
+    job_id = new_job_id()
+    path = await save_upload(job_id, file, "import.paprikarecipes")
+    submit("paprika_import", {"path": path}, job_id=job_id)
+    return job_to_out(get_job(db, job_id))
+
+
 @router.get("/paprika/export")
 def export_saved_paprika(db: Session = Depends(get_db)):
     recipes = (
@@ -1,106 +1,200 @@
+import asyncio
+import json
 import os
-import uuid
-from pathlib import Path
+from collections.abc import AsyncIterator
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import SessionLocal, get_db
 from app.models import Recipe, RecipeTabRecipe, SavedRecipe
 from app.schemas import (
+    JobOut,
     PaginatedRecipes,
     RateRecipeRequest,
+    RecipeImageOut,
     RecipeOut,
     SaveRecipeRequest,
     TopIngredientOut,
 )
-from app.services.import_service import search_recipe_image
+from app.services import extraction_cache, http_client, pexels_cache
+from app.services import job_handlers  # noqa: F401 — registers the job kinds
+from app.services.admission import admission_stats
+from app.services.generation_cache import cache_stats
+from app.services.image_service import IMAGE_PENDING, backfill_recipe_images, image_events, image_states
+from app.services.image_store import (
+    UnsupportedImage,
+    UploadTooLarge,
+    collect_garbage,
+    disk_usage,
+    store_upload,
+)
+from app.services.image_variants import backfill_image_variants, variants_json
+from app.services.ingredient_service import backfill_recipe_ingredients
+from app.services.job_queue import get_job, submit
 from app.services.learning_service import get_top_ingredients, get_user_preferences
+from app.services.llm_gateway import usage_summary
+from app.services.pagination import InvalidCursor, count_cache, keyset_page, offset_page
+from app.services.search_service import apply_search, snippets_for
+from app.services.serialization import job_to_out, recipe_to_out, recipes_to_out
 
-UPLOADS_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "uploads"
-ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+# Checked against the file's leading bytes, not its name
+ALLOWED_IMAGE_TYPES = {".jpg", ".png", ".webp"}
 MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB
+MAX_IMAGE_IDS = 50
+IMAGE_EVENTS_TIMEOUT_SECONDS = 120
 
 router = APIRouter(tags=["recipes"])
 
 
-def _recipe_to_out(recipe: Recipe, db: Session) -> RecipeOut:
-    saved = db.query(SavedRecipe).filter(SavedRecipe.recipe_id == recipe.id).first()
-    return RecipeOut(
-        id=recipe.id,
-        name=recipe.name,
-        ingredients=recipe.ingredients,
-        directions=recipe.directions,
-        description=recipe.description,
-        notes=recipe.notes,
-        source=recipe.source,
-        prep_time=recipe.prep_time,
-        cook_time=recipe.cook_time,
-        total_time=recipe.total_time,
-        servings=recipe.servings,
-        categories=recipe.categories,
-        nutritional_info=recipe.nutritional_info,
-        image_url=recipe.image_url,
-        difficulty=recipe.difficulty,
-        cuisine=recipe.cuisine,
-        ai_generated=recipe.ai_generated,
-        created_at=recipe.created_at,
-        is_saved=saved is not None,
-        rating=saved.rating if saved else None,
-    )
-
-
 @router.get("/recipes", response_model=PaginatedRecipes)
 def list_saved_recipes(
-    page: int = 1,
-    per_page: int = 20,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    include_total: bool = True,
     db: Session = Depends(get_db),
 ):
-    query = (
-        db.query(Recipe)
-        .join(SavedRecipe, SavedRecipe.recipe_id == Recipe.id)
-        .order_by(SavedRecipe.saved_at.desc())
+    query = db.query(Recipe, SavedRecipe.saved_at, SavedRecipe.id).join(
+        SavedRecipe, SavedRecipe.recipe_id == Recipe.id
     )
-    total = query.count()
-    recipes = query.offset((page - 1) * per_page).limit(per_page).all()
+    try:
+        rows, next_cursor = keyset_page(
+            query,
+            SavedRecipe.saved_at,
+            SavedRecipe.id,
+            key=lambda row: (row.saved_at, row.id),
+            cursor=cursor,
+            limit=per_page,
+            offset=(page - 1) * per_page,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    total = count_cache.get_or_count(("saved",), query) if include_total else None
 
     return PaginatedRecipes(
-        recipes=[_recipe_to_out(r, db) for r in recipes],
+        recipes=recipes_to_out(db, [row[0] for row in rows]),
         total=total,
         page=page,
         per_page=per_page,
+        next_cursor=next_cursor,
     )
 
 
 @router.get("/recipes/all", response_model=PaginatedRecipes)
 def list_all_recipes(
-    page: int = 1,
-    per_page: int = 20,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
     search: str | None = None,
     source: str | None = None,
     tab_id: int | None = None,
+    cursor: str | None = None,
+    include_total: bool = True,
     db: Session = Depends(get_db),
 ):
-    query = db.query(Recipe).order_by(Recipe.created_at.desc())
+    query = db.query(Recipe)
     if tab_id is not None:
         query = query.join(
             RecipeTabRecipe, RecipeTabRecipe.recipe_id == Recipe.id
         ).filter(RecipeTabRecipe.tab_id == tab_id)
-    if search:
-        query = query.filter(Recipe.name.ilike(f"%{search}%"))
     if source == "ai":
         query = query.filter(Recipe.ai_generated.is_(True))
     elif source == "imported":
         query = query.filter(Recipe.ai_generated.is_(False))
-
-    total = query.count()
-    recipes = query.offset((page - 1) * per_page).limit(per_page).all()
+    match = None
+    if search:
+        query, match = apply_search(query, search)
+
+    try:
+        if match:
+            # Ranked results have no stable sort key, so their cursor carries an offset
+            recipes, next_cursor = offset_page(
+                query, cursor=cursor, limit=per_page, offset=(page - 1) * per_page
+            )
+        else:
+            recipes, next_cursor = keyset_page(
+                query,
+                Recipe.created_at,
+                Recipe.id,
+                key=lambda r: (r.created_at, r.id),
+                cursor=cursor,
+                limit=per_page,
+                offset=(page - 1) * per_page,
+            )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    total = None
+    if include_total:
+        total = count_cache.get_or_count(("all", search, source, tab_id), query)
+    snippets = snippets_for(db, [r.id for r in recipes], match) if match else None
 
     return PaginatedRecipes(
-        recipes=[_recipe_to_out(r, db) for r in recipes],
+        recipes=recipes_to_out(db, recipes, snippets),
         total=total,
         page=page,
         per_page=per_page,
+        next_cursor=next_cursor,
+    )
+
+
+def _parse_ids(ids: str) -> list[str]:
+    recipe_ids = [i for i in (part.strip() for part in ids.split(",")) if i]
+    if not recipe_ids or len(recipe_ids) > MAX_IMAGE_IDS:
+        raise HTTPException(status_code=400, detail=f"Pass between 1 and {MAX_IMAGE_IDS} recipe ids")
+    return recipe_ids
+
+
+@router.get("/recipes/images", response_model=list[RecipeImageOut])
+def recipe_images(ids: str = Query(..., description="Comma-separated recipe ids"), db: Session = Depends(get_db)):
+    """Image state for recipes whose pictures are still being fetched in the background."""
+    return image_states(db, _parse_ids(ids))
+
+
+def _load_image_states(recipe_ids: list[str]) -> list[dict]:
+    db = SessionLocal()
+    try:
+        return image_states(db, recipe_ids)
+    finally:
+        db.close()
+
+
+async def _image_events(recipe_ids: list[str]) -> AsyncIterator[str]:
+    # Subscribe before reading current state so a fetch finishing in between isn't missed
+    queue = image_events.subscribe(set(recipe_ids))
+    try:
+        pending = set()
+        for state in await run_in_threadpool(_load_image_states, recipe_ids):
+            yield json.dumps(state) + "\n"
+            if state["image_status"] == IMAGE_PENDING:
+                pending.add(state["recipe_id"])
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + IMAGE_EVENTS_TIMEOUT_SECONDS
+        while pending:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=deadline - loop.time())
+            except asyncio.TimeoutError:
+                return
+            if event["recipe_id"] in pending:
+                pending.discard(event["recipe_id"])
+                yield json.dumps(event) + "\n"
+    finally:
+        image_events.unsubscribe(queue)
+
+
+@router.get("/recipes/images/events")
+def recipe_image_events(ids: str = Query(..., description="Comma-separated recipe ids")):
+    """Current image state for each recipe, then one line per pending image as it lands.
+
+    Newline-delimited JSON; the stream ends once nothing is pending.
+    """
+    return StreamingResponse(
+        _image_events(_parse_ids(ids)),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -109,7 +203,7 @@ def get_recipe(recipe_id: str, db: Session = Depends(get_db)):
     recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
-    return _recipe_to_out(recipe, db)
+    return recipe_to_out(db, recipe)
 
 
 @router.post("/recipes/{recipe_id}/save", response_model=RecipeOut)
@@ -129,7 +223,7 @@ def save_recipe(
     saved = SavedRecipe(recipe_id=recipe_id, notes=request.notes)
     db.add(saved)
     db.commit()
-    return _recipe_to_out(recipe, db)
+    return recipe_to_out(db, recipe)
 
 
 @router.post("/recipes/{recipe_id}/rate", response_model=RecipeOut)
@@ -152,7 +246,7 @@ def rate_recipe(
 
     saved.rating = request.rating
     db.commit()
-    return _recipe_to_out(recipe, db)
+    return recipe_to_out(db, recipe)
 
 
 @router.delete("/recipes/{recipe_id}/save")
@@ -171,32 +265,30 @@ async def upload_recipe_image(
     file: UploadFile,
     db: Session = Depends(get_db),
 ):
-    recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
+    recipe = await run_in_threadpool(db.get, Recipe, recipe_id)
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
 
-    ext = Path(file.filename or "").suffix.lower()
-    if ext not in ALLOWED_EXTENSIONS:
+    try:
+        image_url = await store_upload(file, MAX_IMAGE_SIZE, ALLOWED_IMAGE_TYPES)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="Image must be under 5MB")
+    except UnsupportedImage:
         raise HTTPException(status_code=400, detail="File must be JPG, PNG, or WebP")
 
-    contents = await file.read()
-    if len(contents) > MAX_IMAGE_SIZE:
-        raise HTTPException(status_code=400, detail="Image must be under 5MB")
-
-    # Delete old image if exists
-    if recipe.image_url:
-        old_path = UPLOADS_DIR / Path(recipe.image_url).name
-        if old_path.is_file():
-            old_path.unlink()
+    # Decoding and resizing is CPU-bound; keep it off the loop
+    variants = await run_in_threadpool(variants_json, image_url)
+    return await run_in_threadpool(_set_recipe_image, db, recipe, image_url, variants)
 
-    filename = f"{recipe_id}_{uuid.uuid4().hex[:8]}{ext}"
-    UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
-    (UPLOADS_DIR / filename).write_bytes(contents)
 
-    recipe.image_url = f"/api/uploads/{filename}"
+def _set_recipe_image(db: Session, recipe: Recipe, image_url: str, variants: str | None) -> RecipeOut:
+    # The old image may be shared with other recipes; the image GC removes it once it isn't
+    recipe.image_url = image_url
+    recipe.image_status = None
+    recipe.image_variants = variants
     db.commit()
     db.refresh(recipe)
-    return _recipe_to_out(recipe, db)
+    return recipe_to_out(db, recipe)
 
 
 @router.delete("/recipes/{recipe_id}/image")
@@ -206,10 +298,8 @@ def delete_recipe_image(recipe_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Recipe not found")
 
     if recipe.image_url:
-        old_path = UPLOADS_DIR / Path(recipe.image_url).name
-        if old_path.is_file():
-            old_path.unlink()
         recipe.image_url = None
+        recipe.image_variants = None
         db.commit()
 
     return {"status": "removed"}
@@ -225,27 +315,36 @@ def backfill_images(db: Session = Depends(get_db)):
     has_key = bool(cfg.pexels_api_key)
     log.info("Backfill images: pexels_api_key set=%s", has_key)
 
-    recipes = (
-        db.query(Recipe)
-        .filter((Recipe.image_url.is_(None)) | (Recipe.image_url == ""))
-        .all()
-    )
-    updated = 0
-    errors = []
-    for recipe in recipes:
-        image_path, error = search_recipe_image(recipe.name, recipe.id)
-        if image_path:
-            recipe.image_url = image_path
-            updated += 1
-        elif error:
-            errors.append(f"{recipe.name}: {error}")
-    db.commit()
-    return {
-        "total": len(recipes),
-        "updated": updated,
-        "pexels_key_set": has_key,
-        "errors": errors[:5],
-    }
+    result = backfill_recipe_images(db)
+    return {**result, "pexels_key_set": has_key}
+
+
+@router.post("/recipes/backfill-images/async", response_model=JobOut, status_code=202)
+def backfill_images_async(db: Session = Depends(get_db)):
+    """Like /recipes/backfill-images, but returns a job to poll at /jobs/{id} instead of waiting."""
+    return job_to_out(get_job(db, submit("backfill_images")))
+
+
+@router.post("/recipes/backfill-ingredients")
+def backfill_ingredients(db: Session = Depends(get_db)):
+    """Parse and store structured ingredients for recipes that predate recipe_ingredients."""
+    return {"processed": backfill_recipe_ingredients(db)}
+
+
+@router.post("/recipes/backfill-ingredients/async", response_model=JobOut, status_code=202)
+def backfill_ingredients_async(db: Session = Depends(get_db)):
+    return job_to_out(get_job(db, submit("backfill_ingredients")))
+
+
+@router.post("/recipes/backfill-image-variants")
+def backfill_variants(db: Session = Depends(get_db)):
+    """Create thumbnail/card variants for recipes whose images predate them."""
+    return backfill_image_variants(db)
+
+
+@router.post("/recipes/backfill-image-variants/async", response_model=JobOut, status_code=202)
+def backfill_variants_async(db: Session = Depends(get_db)):
+    return job_to_out(get_job(db, submit("backfill_image_variants")))
 
 
 @router.get("/stats/top-ingredients", response_model=list[TopIngredientOut])
@@ -256,3 +355,43 @@ def top_ingredients(limit: int = 10, db: Session = Depends(get_db)):
 @router.get("/stats/preferences")
 def user_preferences(db: Session = Depends(get_db)):
     return get_user_preferences(db)
+
+
+@router.get("/stats/generation-cache")
+def generation_cache_stats(db: Session = Depends(get_db)):
+    return cache_stats(db)
+
+
+@router.get("/stats/extraction-cache")
+def extraction_cache_stats(db: Session = Depends(get_db)):
+    return extraction_cache.cache_stats(db)
+
+
+@router.get("/stats/http")
+def http_pool_stats():
+    """Outbound connection pool usage and the Pexels query cache hit rate."""
+    return {"pool": http_client.pool_stats(), "pexels_cache": pexels_cache.cache_stats()}
+
+
+@router.get("/stats/disk-usage")
+def disk_usage_stats(db: Session = Depends(get_db)):
+    """Size of the uploads volume, stored images and their references, and bytes saved by dedup."""
+    return disk_usage(db)
+
+
+@router.post("/recipes/images/gc")
+def image_gc(grace_minutes: int | None = Query(None, ge=0), db: Session = Depends(get_db)):
+    """Remove image files no recipe references now, instead of waiting for the scheduled run."""
+    return collect_garbage(db, grace_minutes)
+
+
+@router.get("/stats/admission")
+def admission_control_stats():
+    """Per route group: limit, in-flight and queued requests, rejections and wait times."""
+    return admission_stats()
+
+
+@router.get("/stats/llm")
+def llm_usage_stats(since_hours: int = Query(24, ge=1, le=24 * 90), db: Session = Depends(get_db)):
+    """Claude calls per endpoint: counts, errors, latency and token/cache usage."""
+    return usage_summary(db, since_hours)
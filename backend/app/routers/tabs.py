@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import Session
 
 from app.database import get_db
@@ -23,8 +24,17 @@ def _tab_to_out(tab: RecipeTab, db: Session) -> RecipeTabOut:
 
 @router.get("/tabs", response_model=list[RecipeTabOut])
 def list_tabs(db: Session = Depends(get_db)):
-    tabs = db.query(RecipeTab).order_by(RecipeTab.position, RecipeTab.id).all()
-    return [_tab_to_out(t, db) for t in tabs]
+    rows = (
+        db.query(RecipeTab, func.count(RecipeTabRecipe.id))
+        .outerjoin(RecipeTabRecipe, RecipeTabRecipe.tab_id == RecipeTab.id)
+        .group_by(RecipeTab.id)
+        .order_by(RecipeTab.position, RecipeTab.id)
+        .all()
+    )
+    return [
+        RecipeTabOut(id=tab.id, name=tab.name, position=tab.position, recipe_count=count)
+        for tab, count in rows
+    ]
 
 
 @router.post("/tabs", response_model=RecipeTabOut, status_code=201)
@@ -68,14 +78,32 @@ def add_recipes_to_tab(
     tab = db.query(RecipeTab).filter(RecipeTab.id == tab_id).first()
     if not tab:
         raise HTTPException(status_code=404, detail="Tab not found")
-    for recipe_id in body.recipe_ids:
-        existing = (
-            db.query(RecipeTabRecipe)
-            .filter(RecipeTabRecipe.tab_id == tab_id, RecipeTabRecipe.recipe_id == recipe_id)
-            .first()
+    recipe_ids = list(dict.fromkeys(body.recipe_ids))
+    if recipe_ids:
+        db.execute(
+            insert(RecipeTabRecipe)
+            .values([{"tab_id": tab_id, "recipe_id": rid} for rid in recipe_ids])
+            .on_conflict_do_nothing(index_elements=["tab_id", "recipe_id"])
+        )
+    db.commit()
+    db.refresh(tab)
+    return _tab_to_out(tab, db)
+
+
+@router.post("/tabs/{tab_id}/recipes/remove", response_model=RecipeTabOut)
+def remove_recipes_from_tab(
+    tab_id: int, body: AddRecipesToTab, db: Session = Depends(get_db)
+):
+    tab = db.query(RecipeTab).filter(RecipeTab.id == tab_id).first()
+    if not tab:
+        raise HTTPException(status_code=404, detail="Tab not found")
+    if body.recipe_ids:
+        db.execute(
+            delete(RecipeTabRecipe).where(
+                RecipeTabRecipe.tab_id == tab_id,
+                RecipeTabRecipe.recipe_id.in_(body.recipe_ids),
+            )
         )
-        if not existing:
-            db.add(RecipeTabRecipe(tab_id=tab_id, recipe_id=recipe_id))
     db.commit()
     db.refresh(tab)
     return _tab_to_out(tab, db)
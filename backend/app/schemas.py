@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class RecipeBase(BaseModel):
@@ -27,6 +27,9 @@ class RecipeOut(RecipeBase):
     created_at: datetime
     is_saved: bool = False
     rating: int | None = None
+    snippet: str | None = None
+    image_status: str | None = None
+    image_variants: dict[str, str] | None = None
 
     model_config = {"from_attributes": True}
 
@@ -36,10 +39,41 @@ class GenerateRequest(BaseModel):
     dietary_preferences: str | None = None
     cuisine_preference: str | None = None
     max_cook_time: str | None = None
+    prefer_library: bool = False
+    bypass_cache: bool = False
+    count: int = 3
+    fan_out: bool = False
+
+
+class RecipeImageOut(BaseModel):
+    recipe_id: str
+    image_url: str | None = None
+    image_status: str | None = None
+    image_variants: dict[str, str] | None = None
 
 
 class GenerateResponse(BaseModel):
     recipes: list[RecipeOut]
+    from_library: bool = False
+    cached: bool = False
+
+
+class MatchRequest(BaseModel):
+    ingredients: list[str]
+    limit: int = Field(10, ge=1, le=100)
+    max_missing: int | None = Field(None, ge=0)
+
+
+class RecipeMatchOut(BaseModel):
+    recipe: RecipeOut
+    coverage: float
+    matched_count: int
+    missing_count: int
+    missing: list[str]
+
+
+class MatchResponse(BaseModel):
+    matches: list[RecipeMatchOut]
 
 
 class SaveRecipeRequest(BaseModel):
@@ -63,9 +97,10 @@ class TopIngredientOut(BaseModel):
 
 class PaginatedRecipes(BaseModel):
     recipes: list[RecipeOut]
-    total: int
+    total: int | None = None
     page: int
     per_page: int
+    next_cursor: str | None = None
 
 
 class RecipeTabCreate(BaseModel):
@@ -88,3 +123,23 @@ class RecipeTabOut(BaseModel):
 
 class AddRecipesToTab(BaseModel):
     recipe_ids: list[str]
+
+
+class JobSubmit(BaseModel):
+    kind: str
+    payload: dict = {}
+
+
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    status: str
+    progress_done: int
+    progress_total: int | None = None
+    result: dict | None = None
+    error: str | None = None
+    cancel_requested: bool = False
+    attempts: int = 0
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
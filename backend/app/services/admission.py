@@ -0,0 +1,153 @@
+import asyncio
+import json
+import math
+import re
+import threading
+import time
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+
+# Expensive routes, grouped under a limit name: (name, method, path pattern)
+LIMITED_ROUTES = [
+    ("generate", "POST", re.compile(r"^/api/recipes/generate(?:/stream)?$")),
+    ("suggestions", "POST", re.compile(r"^/api/suggestions/refresh$")),
+    ("import", "POST", re.compile(r"^/api/import/(?:url|files)$")),
+    ("import", "POST", re.compile(r"^/api/paprika/import$")),
+    ("backfill", "POST", re.compile(r"^/api/recipes/backfill-(?:images|ingredients|image-variants)$")),
+    ("backfill", "POST", re.compile(r"^/api/recipes/images/gc$")),
+]
+
+
+class RouteLimiter:
+    """Concurrency cap with a bounded, time-limited wait queue, plus the numbers to watch it by."""
+
+    def __init__(self, name: str, limit: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(limit)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._service_total = 0.0
+        self._served = 0
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from the average time a request holds one."""
+        avg_service = self._service_total / self._served if self._served else 1.0
+        return max(1, math.ceil(avg_service * (self.waiting + 1) / self.limit))
+
+    async def acquire(self) -> bool:
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            return False
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            return False
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - started
+        with self._lock:
+            self.active += 1
+            self.admitted += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return True
+
+    def release(self, service_seconds: float) -> None:
+        with self._lock:
+            self.active -= 1
+            self._service_total += service_seconds
+            self._served += 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "max_wait_seconds": self.max_wait,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(self._wait_total / self.admitted * 1000) if self.admitted else 0,
+            "max_wait_ms": round(self._wait_max * 1000),
+            "avg_service_ms": round(self._service_total / self._served * 1000) if self._served else 0,
+        }
+
+
+def _build_limiters() -> dict[str, RouteLimiter]:
+    limiters = {}
+    for name, _, _ in LIMITED_ROUTES:
+        if name in limiters:
+            continue
+        limit = settings.admission_concurrency.get(name, settings.admission_default_concurrency)
+        queue = settings.admission_queue.get(name, limit * 2)
+        limiters[name] = RouteLimiter(name, limit, queue, settings.admission_max_wait_seconds)
+    return limiters
+
+
+limiters = _build_limiters()
+
+
+def admission_stats() -> dict:
+    return {name: limiter.stats() for name, limiter in limiters.items()}
+
+
+class AdmissionControlMiddleware:
+    """Cap concurrent requests to expensive routes so they can't starve cheap reads.
+
+    Requests over a route's limit wait in a bounded queue for up to max_wait seconds;
+    when the queue is full or the wait runs out they get 429 with Retry-After.
+    Limits are per process.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limiter = None
+        if scope["type"] == "http":
+            for name, method, pattern in LIMITED_ROUTES:
+                if scope["method"] == method and pattern.match(scope["path"]):
+                    limiter = limiters[name]
+                    break
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            await self._reject(send, limiter)
+            return
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.monotonic() - started)
+
+    @staticmethod
+    async def _reject(send: Send, limiter: RouteLimiter) -> None:
+        body = json.dumps({"detail": f"Too many concurrent {limiter.name} requests, try again shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(limiter.retry_after()).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
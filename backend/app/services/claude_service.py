@@ -1,13 +1,20 @@
+import asyncio
 import json
 import logging
+import time
+from collections.abc import AsyncIterator
+from datetime import date
 
 import anthropic
 
 from app.config import settings
+from app.services import llm_gateway
+from app.services.llm_gateway import MODEL
 
 logger = logging.getLogger(__name__)
 
-client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
+# Bump when RECIPE_SYSTEM_PROMPT or _build_generate_prompt change, so cached generations are not reused
+RECIPE_PROMPT_VERSION = 1
 
 RECIPE_SYSTEM_PROMPT = """You are a professional chef and recipe creator. When given ingredients,
 create delicious, practical recipes. Always respond with valid JSON only — no markdown, no extra text.
@@ -87,11 +94,7 @@ def _extract_json(text: str) -> str:
     return text.strip()
 
 
-def generate_recipes(
-    ingredients: list[str],
-    preferences: dict | None = None,
-    count: int = 3,
-) -> list[dict]:
+def _build_generate_prompt(ingredients: list[str], preferences: dict | None, count: int) -> str:
     pref_context = ""
     if preferences:
         if preferences.get("top_ingredients"):
@@ -103,7 +106,7 @@ def generate_recipes(
         if preferences.get("dietary_preferences"):
             pref_context += f"\nDietary preferences: {preferences['dietary_preferences']}"
 
-    user_prompt = f"""Create {count} recipes using these ingredients: {', '.join(ingredients)}
+    user_prompt = f"""Create {count} recipe{"s" if count != 1 else ""} using these ingredients: {', '.join(ingredients)}
 
 The recipes should primarily use the listed ingredients but can include common pantry staples
 (salt, pepper, oil, butter, garlic, onion, common spices).
@@ -113,14 +116,18 @@ The recipes should primarily use the listed ingredients but can include common p
         user_prompt += f"\nPreferred cuisine style: {preferences['cuisine_preference']}"
     if preferences and preferences.get("max_cook_time"):
         user_prompt += f"\nMaximum cooking time: {preferences['max_cook_time']}"
+    return user_prompt
+
+
+async def generate_recipes(
+    ingredients: list[str],
+    preferences: dict | None = None,
+    count: int = 3,
+) -> list[dict]:
+    user_prompt = _build_generate_prompt(ingredients, preferences, count)
 
     try:
-        message = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=4096,
-            system=RECIPE_SYSTEM_PROMPT,
-            messages=[{"role": "user", "content": user_prompt}],
-        )
+        message = await llm_gateway.acomplete("generate", RECIPE_SYSTEM_PROMPT, user_prompt, max_tokens=4096)
         raw_text = message.content[0].text
         logger.info("Claude raw response (first 200 chars): %s", raw_text[:200])
         cleaned = _extract_json(raw_text)
@@ -130,10 +137,159 @@ The recipes should primarily use the listed ingredients but can include common p
         raise
 
 
-def generate_daily_suggestions(preferences: dict | None = None) -> dict:
-    from datetime import date
+# Rotated across fan-out requests so concurrent single-recipe calls don't converge on one dish
+FANOUT_ANGLES = [
+    "a quick weeknight dinner",
+    "a comforting classic",
+    "something light and fresh",
+    "a bold, spiced dish",
+    "a one-pot or sheet-pan meal",
+    "a dish from a cuisine not yet covered",
+    "a brunch or breakfast idea",
+    "a make-ahead dish that keeps well",
+]
+
+
+def _valid_recipe(data: object) -> dict | None:
+    """A normalized recipe, or None if Claude's object is missing the fields we need."""
+    if isinstance(data, list) and len(data) == 1:
+        data = data[0]
+    if not isinstance(data, dict):
+        return None
+    data = normalize_recipe(data)
+    if not data.get("name") or not data.get("ingredients") or not data.get("directions"):
+        return None
+    return data
+
+
+async def _generate_one(
+    ingredients: list[str], preferences: dict | None, angle: str, semaphore: asyncio.Semaphore
+) -> dict | None:
+    user_prompt = _build_generate_prompt(ingredients, preferences, 1) + f"\nMake this recipe {angle}."
+    async with semaphore:
+        message = await llm_gateway.acomplete("generate_fanout", RECIPE_SYSTEM_PROMPT, user_prompt, max_tokens=1536)
+    recipe = _valid_recipe(json.loads(_extract_json(message.content[0].text)))
+    if recipe is None:
+        logger.warning("Discarding invalid fan-out recipe (%s)", angle)
+    return recipe
+
+
+async def fan_out_recipes(
+    ingredients: list[str],
+    preferences: dict | None = None,
+    count: int = 3,
+    deadline_seconds: float | None = None,
+    max_concurrency: int | None = None,
+) -> AsyncIterator[dict]:
+    """Generate count recipes as concurrent single-recipe calls, yielding each as it completes.
+
+    Stops at the deadline with whatever has finished; failed or invalid calls are
+    skipped, as are duplicates of a recipe already yielded.
+    """
+    deadline = time.monotonic() + (deadline_seconds or settings.generation_fanout_deadline_seconds)
+    semaphore = asyncio.Semaphore(max_concurrency or settings.generation_fanout_max_concurrency)
+    tasks = [
+        asyncio.create_task(_generate_one(ingredients, preferences, FANOUT_ANGLES[i % len(FANOUT_ANGLES)], semaphore))
+        for i in range(count)
+    ]
+    seen = set()
+    try:
+        pending = set(tasks)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning("Fan-out deadline hit with %d of %d recipes pending", len(pending), count)
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    recipe = task.result()
+                except Exception as e:
+                    logger.warning("Fan-out recipe request failed: %s", e)
+                    continue
+                if recipe is None or recipe["name"].lower() in seen:
+                    continue
+                seen.add(recipe["name"].lower())
+                yield recipe
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def generate_recipes_fanout(
+    ingredients: list[str],
+    preferences: dict | None = None,
+    count: int = 3,
+) -> list[dict]:
+    recipes = [recipe async for recipe in fan_out_recipes(ingredients, preferences, count)]
+    if not recipes:
+        raise RuntimeError("No recipes were generated before the deadline")
+    return recipes
+
+
+class JsonArrayObjectParser:
+    """Pull complete top-level objects out of a JSON array while its text is still streaming in.
+
+    Anything outside the array's objects (brackets, commas, code fences) is ignored.
+    """
+
+    def __init__(self):
+        self._buf: list[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> list[dict]:
+        completed = []
+        for ch in chunk:
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._buf = [ch]
+                continue
+
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        completed.append(json.loads("".join(self._buf)))
+                    except json.JSONDecodeError as e:
+                        logger.warning("Skipping malformed streamed recipe: %s", e)
+        return completed
+
+
+async def stream_recipes(
+    ingredients: list[str],
+    preferences: dict | None = None,
+    count: int = 3,
+) -> AsyncIterator[dict]:
+    """Like generate_recipes, but yields each recipe as soon as its JSON object is complete."""
+    user_prompt = _build_generate_prompt(ingredients, preferences, count)
+    parser = JsonArrayObjectParser()
+
+    try:
+        async for text in llm_gateway.astream("generate_stream", RECIPE_SYSTEM_PROMPT, user_prompt, max_tokens=4096):
+            for recipe in parser.feed(text):
+                yield recipe
+    except anthropic.APIError as e:
+        logger.error("Claude API error during streamed recipe generation: %s", e)
+        raise
+
 
-    today = date.today()
+def generate_daily_suggestions(preferences: dict | None = None, day: date | None = None) -> dict:
+    today = day or date.today()
     month_names = [
         "", "January", "February", "March", "April", "May", "June",
         "July", "August", "September", "October", "November", "December",
@@ -158,12 +314,7 @@ Consider the season and day of the week when choosing a theme and recipes.
 Make the recipes varied — include different meal types (breakfast, lunch, dinner, snack/dessert)."""
 
     try:
-        message = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=6000,
-            system=SUGGESTION_SYSTEM_PROMPT,
-            messages=[{"role": "user", "content": user_prompt}],
-        )
+        message = llm_gateway.complete("daily_suggestions", SUGGESTION_SYSTEM_PROMPT, user_prompt, max_tokens=6000)
         print(f"[SUGGESTIONS] stop_reason={message.stop_reason} content_blocks={len(message.content)}", flush=True)
         raw_text = message.content[0].text
         print(f"[SUGGESTIONS] raw response (first 300 chars): {raw_text[:300]}", flush=True)
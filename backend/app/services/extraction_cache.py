@@ -0,0 +1,130 @@
+import hashlib
+import json
+import threading
+from datetime import datetime
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import ExtractionCacheEntry, ImportSource
+
+
+class _Counters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def record_not_modified(self) -> None:
+        with self._lock:
+            self.not_modified += 1
+
+
+counters = _Counters()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def extraction_key(text: str, prompt_version: int, model: str) -> str:
+    """Content address for an extraction: same text, same prompt, same model → same key."""
+    raw = f"{prompt_version}:{model}:{content_hash(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def lookup(db: Session, key: str) -> list[dict] | None:
+    """The recipes Claude extracted from this content before, or None."""
+    entry = db.get(ExtractionCacheEntry, key)
+    if entry is None:
+        counters.record(hit=False)
+        return None
+
+    counters.record(hit=True)
+    # Bookkeeping only: write through the connection so ORM write hooks don't fire
+    db.connection().execute(
+        update(ExtractionCacheEntry)
+        .where(ExtractionCacheEntry.key == key)
+        .values(hits=ExtractionCacheEntry.hits + 1, last_used_at=datetime.utcnow())
+    )
+    db.commit()
+    return json.loads(entry.response)
+
+
+def store(db: Session, key: str, text: str, recipes: list[dict], source: str | None = None) -> None:
+    now = datetime.utcnow()
+    entry = db.get(ExtractionCacheEntry, key)
+    if entry is None:
+        entry = ExtractionCacheEntry(key=key)
+        db.add(entry)
+    entry.content_hash = content_hash(text)
+    entry.source = source
+    entry.response = json.dumps(recipes)
+    entry.created_at = now
+    entry.last_used_at = now
+    db.flush()
+    _evict(db)
+    db.commit()
+
+
+def _evict(db: Session) -> None:
+    """Drop the least recently used entries beyond the size bound.
+
+    Entries never go stale on their own: a changed source or prompt is a different key.
+    """
+    overflow = (
+        select(ExtractionCacheEntry.key)
+        .order_by(ExtractionCacheEntry.last_used_at.desc())
+        .offset(settings.extraction_cache_max_entries)
+    )
+    db.execute(delete(ExtractionCacheEntry).where(ExtractionCacheEntry.key.in_(overflow)))
+
+
+def conditional_headers(source: ImportSource | None) -> dict[str, str]:
+    """Request headers that let the origin answer 304 if the page hasn't changed."""
+    headers = {}
+    if source is not None:
+        if source.etag:
+            headers["If-None-Match"] = source.etag
+        if source.last_modified:
+            headers["If-Modified-Since"] = source.last_modified
+    return headers
+
+
+def get_source(db: Session, url: str) -> ImportSource | None:
+    return db.get(ImportSource, url)
+
+
+def store_source(db: Session, url: str, body: str, etag: str | None, last_modified: str | None) -> None:
+    source = db.get(ImportSource, url)
+    if source is None:
+        source = ImportSource(url=url)
+        db.add(source)
+    source.body = body
+    source.content_hash = content_hash(body)
+    source.etag = etag
+    source.last_modified = last_modified
+    source.fetched_at = datetime.utcnow()
+    db.commit()
+
+
+def cache_stats(db: Session) -> dict:
+    total = counters.hits + counters.misses
+    return {
+        "hits": counters.hits,
+        "misses": counters.misses,
+        "hit_rate": round(counters.hits / total, 3) if total else 0.0,
+        "not_modified": counters.not_modified,
+        "entries": db.query(ExtractionCacheEntry).count(),
+        "max_entries": settings.extraction_cache_max_entries,
+        "sources": db.query(ImportSource).count(),
+    }
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import GenerationCacheEntry, Recipe
+from app.services.claude_service import MODEL, RECIPE_PROMPT_VERSION
+
+
+class _Counters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+counters = _Counters()
+
+# Preferences the request sets explicitly. Learned ones (top ingredients, cuisines,
+# ratings) are left out: track_search updates them after every generation, so keying
+# on them would make the next identical request miss. They only nudge the prompt.
+KEYED_PREFERENCES = ("dietary_preferences", "cuisine_preference", "max_cook_time")
+
+
+def generation_key(
+    ingredients: list[str], preferences: dict | None, count: int, fan_out: bool = False
+) -> str:
+    """Content address for a generation request: same inputs, same prompt, same model → same key."""
+    normalized = sorted({i.strip().lower() for i in ingredients if i.strip()})
+    prefs = {k: v for k, v in (preferences or {}).items() if k in KEYED_PREFERENCES and v}
+    payload = {
+        "ingredients": normalized,
+        "preferences": prefs,
+        "count": count,
+        "fan_out": fan_out,
+        "prompt_version": RECIPE_PROMPT_VERSION,
+        "model": MODEL,
+    }
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def lookup(db: Session, key: str) -> tuple[list[dict], list[Recipe] | None] | None:
+    """Return (raw recipes, previously saved Recipe rows or None) for a fresh entry, else None.
+
+    The saved rows are returned only if all of them still exist, so a hit doesn't
+    re-insert recipes the library already holds.
+    """
+    entry = db.get(GenerationCacheEntry, key)
+    ttl = timedelta(hours=settings.generation_cache_ttl_hours)
+    if entry is None or entry.created_at < datetime.utcnow() - ttl:
+        counters.record(hit=False)
+        return None
+
+    counters.record(hit=True)
+    # Bookkeeping only: write through the connection so ORM write hooks (and the
+    # response cache invalidation they drive) don't fire for a read
+    db.connection().execute(
+        update(GenerationCacheEntry)
+        .where(GenerationCacheEntry.key == key)
+        .values(hits=GenerationCacheEntry.hits + 1, last_used_at=datetime.utcnow())
+    )
+    db.commit()
+
+    recipes = None
+    if entry.recipe_ids:
+        ids = json.loads(entry.recipe_ids)
+        found = {r.id: r for r in db.query(Recipe).filter(Recipe.id.in_(ids))}
+        if len(found) == len(ids):
+            recipes = [found[i] for i in ids]
+    return json.loads(entry.response), recipes
+
+
+def store(db: Session, key: str, raw_recipes: list[dict], recipe_ids: list[str] | None = None) -> None:
+    now = datetime.utcnow()
+    entry = db.get(GenerationCacheEntry, key)
+    if entry is None:
+        entry = GenerationCacheEntry(key=key)
+        db.add(entry)
+    entry.response = json.dumps(raw_recipes)
+    entry.recipe_ids = json.dumps(recipe_ids) if recipe_ids else None
+    entry.created_at = now
+    entry.last_used_at = now
+    db.flush()
+    _evict(db)
+    db.commit()
+
+
+def _evict(db: Session) -> None:
+    """Drop expired entries, then the least recently used beyond the size bound."""
+    cutoff = datetime.utcnow() - timedelta(hours=settings.generation_cache_ttl_hours)
+    db.execute(delete(GenerationCacheEntry).where(GenerationCacheEntry.created_at < cutoff))
+    overflow = (
+        select(GenerationCacheEntry.key)
+        .order_by(GenerationCacheEntry.last_used_at.desc())
+        .offset(settings.generation_cache_max_entries)
+    )
+    db.execute(delete(GenerationCacheEntry).where(GenerationCacheEntry.key.in_(overflow)))
+
+
+def cache_stats(db: Session) -> dict:
+    total = counters.hits + counters.misses
+    return {
+        "hits": counters.hits,
+        "misses": counters.misses,
+        "hit_rate": round(counters.hits / total, 3) if total else 0.0,
+        "entries": db.query(GenerationCacheEntry).count(),
+        "max_entries": settings.generation_cache_max_entries,
+        "ttl_hours": settings.generation_cache_ttl_hours,
+    }
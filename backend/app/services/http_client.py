@@ -0,0 +1,115 @@
+"""Long-lived pooled HTTP clients for outbound calls (Pexels, image downloads, URL imports).
+
+Connections are kept alive and reused across requests instead of paying a TCP/TLS
+handshake per call. HTTP/2 is used when the optional ``h2`` package is installed.
+The Anthropic SDK keeps its own pooled client, so slow LLM streams can't starve this pool.
+"""
+
+import importlib.util
+import threading
+from collections import Counter
+
+import httpx
+
+from app.config import settings
+
+USER_AGENT = "Mozilla/5.0 (compatible; RecipeFinder/1.0)"
+
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+
+class _PoolCounters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.http_versions: Counter[str] = Counter()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connections_opened += 1
+
+    def record_response(self, response: httpx.Response) -> None:
+        with self._lock:
+            self.http_versions[response.http_version] += 1
+
+
+counters = _PoolCounters()
+
+
+def _trace(event: str, info: dict) -> None:
+    # httpcore reports each new TCP connection; requests without one reused a pooled connection
+    if event == "connection.connect_tcp.complete":
+        counters.record_connect()
+
+
+async def _atrace(event: str, info: dict) -> None:
+    _trace(event, info)
+
+
+def _on_request(request: httpx.Request) -> None:
+    counters.record_request()
+    request.extensions["trace"] = _trace
+
+
+async def _aon_request(request: httpx.Request) -> None:
+    counters.record_request()
+    request.extensions["trace"] = _atrace
+
+
+def _on_response(response: httpx.Response) -> None:
+    counters.record_response(response)
+
+
+async def _aon_response(response: httpx.Response) -> None:
+    counters.record_response(response)
+
+
+def _options() -> dict:
+    return {
+        "http2": HTTP2,
+        "limits": httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry_seconds,
+        ),
+        "timeout": httpx.Timeout(settings.http_timeout_seconds, connect=settings.http_connect_timeout_seconds),
+        "headers": {"User-Agent": USER_AGENT},
+        "follow_redirects": True,
+    }
+
+
+# Blocking callers (background image fetches) use `client`; handlers on the loop use `async_client`
+client = httpx.Client(**_options(), event_hooks={"request": [_on_request], "response": [_on_response]})
+async_client = httpx.AsyncClient(
+    **_options(), event_hooks={"request": [_aon_request], "response": [_aon_response]}
+)
+
+
+def _pool_size(http_client: httpx.Client | httpx.AsyncClient) -> dict:
+    # httpcore doesn't publish pool state; read it defensively
+    pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    return {
+        "open": len(connections),
+        "idle": sum(1 for c in connections if c.is_idle()),
+    }
+
+
+def pool_stats() -> dict:
+    reused = max(counters.requests - counters.connections_opened, 0)
+    return {
+        "http2": HTTP2,
+        "requests": counters.requests,
+        "connections_opened": counters.connections_opened,
+        "connection_reuse_rate": round(reused / counters.requests, 3) if counters.requests else 0.0,
+        "http_versions": dict(counters.http_versions),
+        "max_connections": settings.http_max_connections,
+        "max_keepalive_connections": settings.http_max_keepalive_connections,
+        "sync_pool": _pool_size(client),
+        "async_pool": _pool_size(async_client),
+    }
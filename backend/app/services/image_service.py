@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Recipe
+from app.services import http_client, pexels_cache
+from app.services.image_store import store_bytes
+from app.services.image_variants import parse_variants, variants_json
+
+logger = logging.getLogger(__name__)
+
+# Recipe.image_status values. None means no lookup was ever requested.
+IMAGE_PENDING = "pending"
+IMAGE_READY = "ready"
+IMAGE_MISSING = "missing"
+
+
+def _search_pexels(recipe_name: str) -> tuple[str | None, str | None]:
+    """Medium-size photo URL for a recipe name, consulting the query cache first.
+    Returns (photo_url, error_string)."""
+    query = pexels_cache.normalize_query(recipe_name)
+    found, photo_url = pexels_cache.lookup(query)
+    if found:
+        return photo_url, None if photo_url else "no_photos_returned"
+
+    resp = http_client.client.get(
+        "https://api.pexels.com/v1/search",
+        params={
+            "query": " ".join(pexels_cache.search_terms(recipe_name)) + " food",
+            "per_page": 1,
+            "orientation": "landscape",
+        },
+        headers={"Authorization": settings.pexels_api_key},
+        timeout=10,
+    )
+    resp.raise_for_status()
+    photos = resp.json().get("photos", [])
+    # Use the medium-sized image (good balance of quality/size)
+    photo_url = photos[0].get("src", {}).get("medium") if photos else None
+    pexels_cache.store(query, photo_url)
+    if not photos:
+        return None, "no_photos_returned"
+    return photo_url, None if photo_url else "no_medium_src"
+
+
+def search_recipe_image(recipe_name: str) -> tuple[str | None, str | None]:
+    """Search Pexels for a food photo matching the recipe name and download it.
+    Returns (local_url_path, error_string). One of the two will be None."""
+    if not settings.pexels_api_key:
+        return None, "no_api_key"
+
+    try:
+        image_url, error = _search_pexels(recipe_name)
+        if not image_url:
+            return None, error
+
+        path = _download_image(image_url)
+        if not path:
+            return None, "download_failed"
+        return path, None
+    except httpx.HTTPStatusError as e:
+        logger.warning("Pexels API error for '%s': %s %s", recipe_name, e.response.status_code, e.response.text[:200])
+        return None, f"pexels_http_{e.response.status_code}"
+    except Exception as e:
+        logger.warning("Pexels image search failed for '%s': %s", recipe_name, e)
+        return None, f"{type(e).__name__}: {e}"
+
+
+def backfill_recipe_images(
+    db: Session,
+    checkpoint: dict | None = None,
+    on_progress: Callable[[int, int, dict], None] | None = None,
+) -> dict:
+    """Fetch Pexels images for recipes that have none, committing each as it lands.
+
+    Recipes are visited in id order so the state passed to on_progress(done, total,
+    state) is a checkpoint the backfill can resume from.
+    """
+    state = dict(checkpoint or {"after_id": "", "done": 0, "updated": 0, "errors": []})
+    recipes = (
+        db.query(Recipe)
+        .filter((Recipe.image_url.is_(None)) | (Recipe.image_url == ""))
+        .filter(Recipe.id > state["after_id"])
+        .order_by(Recipe.id)
+        .all()
+    )
+    total = state["done"] + len(recipes)
+    for recipe in recipes:
+        if on_progress:
+            on_progress(state["done"], total, state)
+        image_path, error = search_recipe_image(recipe.name)
+        if image_path:
+            recipe.image_url = image_path
+            recipe.image_status = IMAGE_READY
+            recipe.image_variants = variants_json(image_path)
+            db.commit()
+            state["updated"] += 1
+        elif error:
+            state["errors"].append(f"{recipe.name}: {error}")
+        state["after_id"] = recipe.id
+        state["done"] += 1
+    if on_progress:
+        on_progress(state["done"], total, state)
+    return {"total": total, "updated": state["updated"], "errors": state["errors"][:5]}
+
+
+def _download_image(image_url: str) -> str | None:
+    """Download an image into the image store. Returns the local URL path or None."""
+    try:
+        resp = http_client.client.get(image_url)
+        resp.raise_for_status()
+
+        content_type = resp.headers.get("content-type", "")
+        if "jpeg" in content_type or "jpg" in content_type:
+            ext = ".jpg"
+        elif "png" in content_type:
+            ext = ".png"
+        elif "webp" in content_type:
+            ext = ".webp"
+        else:
+            # Try to guess from URL
+            url_lower = image_url.lower().split("?")[0]
+            if url_lower.endswith(".png"):
+                ext = ".png"
+            elif url_lower.endswith(".webp"):
+                ext = ".webp"
+            else:
+                ext = ".jpg"
+
+        if len(resp.content) > 5 * 1024 * 1024:
+            logger.warning("Image too large, skipping: %s", image_url)
+            return None
+
+        return store_bytes(resp.content, ext)
+    except Exception as e:
+        logger.warning("Failed to download image %s: %s", image_url, e)
+        return None
+
+
+class ImageEvents:
+    """Fan out image results to streaming subscribers; publish is safe from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: list[tuple[asyncio.AbstractEventLoop, asyncio.Queue, set[str]]] = []
+
+    def subscribe(self, recipe_ids: set[str]) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.append((asyncio.get_running_loop(), queue, recipe_ids))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s[1] is not queue]
+
+    def publish(self, event: dict) -> None:
+        with self._lock:
+            targets = [(loop, queue) for loop, queue, ids in self._subscribers if event["recipe_id"] in ids]
+        for loop, queue in targets:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+
+image_events = ImageEvents()
+
+_executor = ThreadPoolExecutor(max_workers=settings.image_fetch_concurrency, thread_name_prefix="image-fetch")
+
+
+def fetch_image(recipe_id: str, recipe_name: str, source_image_url: str | None = None) -> str | None:
+    """Download the source page's image or find one on Pexels, and record the outcome on the recipe."""
+    image_path = _download_image(source_image_url) if source_image_url else None
+    if not image_path:
+        image_path, _ = search_recipe_image(recipe_name)
+
+    status = IMAGE_READY if image_path else IMAGE_MISSING
+    variants = variants_json(image_path)
+    db = SessionLocal()
+    try:
+        # Set through the ORM (not a bulk update) so the image store counts the reference
+        recipe = db.get(Recipe, recipe_id)
+        if recipe is not None:
+            recipe.image_status = status
+            if image_path:
+                recipe.image_url = image_path
+                recipe.image_variants = variants
+            db.commit()
+    finally:
+        db.close()
+
+    image_events.publish({
+        "recipe_id": recipe_id,
+        "image_url": image_path,
+        "image_status": status,
+        "image_variants": parse_variants(variants),
+    })
+    return image_path
+
+
+def _fetch_logged(recipe_id: str, recipe_name: str, source_image_url: str | None) -> None:
+    try:
+        fetch_image(recipe_id, recipe_name, source_image_url)
+    except Exception:
+        logger.exception("Background image fetch failed for recipe %s", recipe_id)
+
+
+def mark_pending(recipe: Recipe) -> None:
+    """Flag a recipe as waiting for its image; call before the commit that saves it."""
+    if not recipe.image_url:
+        recipe.image_status = IMAGE_PENDING
+
+
+def schedule_image_fetches(recipes: list[Recipe], source_image_url: str | None = None) -> None:
+    """Fetch images for committed, pending recipes in the background, concurrently.
+
+    source_image_url, if given, is tried for the first recipe before Pexels.
+    """
+    for i, recipe in enumerate(recipes):
+        if recipe.image_status != IMAGE_PENDING:
+            continue
+        _executor.submit(_fetch_logged, recipe.id, recipe.name, source_image_url if i == 0 else None)
+
+
+def resume_pending_images(db: Session) -> int:
+    """Re-schedule lookups a previous process left pending (e.g. it restarted mid-fetch)."""
+    pending = db.query(Recipe).filter(Recipe.image_status == IMAGE_PENDING).all()
+    schedule_image_fetches(pending)
+    if pending:
+        logger.info("Resumed %d pending image lookups", len(pending))
+    return len(pending)
+
+
+def image_states(db: Session, recipe_ids: list[str]) -> list[dict]:
+    rows = (
+        db.query(Recipe.id, Recipe.image_url, Recipe.image_status, Recipe.image_variants)
+        .filter(Recipe.id.in_(recipe_ids))
+        .all()
+    )
+    return [
+        {
+            "recipe_id": r.id,
+            "image_url": r.image_url,
+            "image_status": r.image_status,
+            "image_variants": parse_variants(r.image_variants),
+        }
+        for r in rows
+    ]
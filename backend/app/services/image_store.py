@@ -0,0 +1,411 @@
+"""Content-addressed storage for recipe images.
+
+Files are named by the SHA-256 of their bytes, so byte-identical images (the same
+Pexels photo for two recipes, a re-imported Paprika export) are stored once. The
+``image_blobs`` table counts how many recipes reference each file; the counts are
+kept current by a flush hook on Recipe.image_url, whatever the write path.
+
+Unreferenced files are removed by ``collect_garbage``, which runs on a schedule. It
+re-derives the counts from the recipes table first, and also sweeps files from
+before this store existed.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Connection, case, delete, event, func, insert, inspect, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models import ImageBlob, Recipe
+from app.services.image_variants import VARIANTS_DIR, delete_variants, variants_json
+from app.services.single_flight import release, try_acquire
+
+UPLOADS_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "uploads"
+URL_PREFIX = "/api/uploads/"
+
+logger = logging.getLogger(__name__)
+
+GC_LEASE = "image_gc"
+GC_LEASE_SECONDS = 15 * 60
+
+UPLOAD_CHUNK_BYTES = 256 * 1024
+
+# Leading bytes -> extension; anything unrecognized is stored as .jpg like before
+_SIGNATURES = [
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+]
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class UnsupportedImage(ValueError):
+    pass
+
+
+def sniff_extension(data: bytes) -> str | None:
+    """File extension for an image's bytes, or None if it isn't a format we store."""
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return ".webp"
+    for signature, ext in _SIGNATURES:
+        if data.startswith(signature):
+            return ext
+    return None
+
+
+def filename_for(url: str | None) -> str | None:
+    if not url or not url.startswith(URL_PREFIX):
+        return None
+    return Path(url).name
+
+
+def _register(filename: str, digest: str, size: int, conn: Connection | None = None) -> None:
+    """Record a stored file in image_blobs.
+
+    With conn, the row is written in that connection's transaction. Callers that
+    already flushed hold SQLite's write lock, so a second connection would wait
+    out busy_timeout and fail.
+    """
+    # A new blob starts unreferenced; the flush hook counts the recipe that adopts it
+    now = datetime.utcnow()
+    new_blob = insert(ImageBlob).values(
+        filename=filename, sha256=digest, size_bytes=size, refcount=0,
+        created_at=now, unreferenced_at=now,
+    )
+    # Already stored. If nothing references it yet, restart its grace period so GC
+    # doesn't take it before the recipe reusing it commits
+    reused_blob = (
+        update(ImageBlob)
+        .where(ImageBlob.filename == filename, ImageBlob.refcount <= 0)
+        .values(unreferenced_at=now)
+    )
+    if conn is not None:
+        try:
+            with conn.begin_nested():
+                conn.execute(new_blob)
+        except IntegrityError:
+            conn.execute(reused_blob)
+        return
+    try:
+        with engine.begin() as conn:
+            conn.execute(new_blob)
+    except IntegrityError:
+        with engine.begin() as conn:
+            conn.execute(reused_blob)
+
+
+def _temp_file() -> tuple[int, str]:
+    # In the uploads directory, so the final rename never crosses filesystems
+    UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+    return tempfile.mkstemp(dir=UPLOADS_DIR, prefix=".incoming-")
+
+
+def _place(tmp: str, digest: str, ext: str, size: int, conn: Connection | None = None) -> str:
+    """Move a fully written temp file to its content address, or drop it if that exists."""
+    filename = f"{digest}{ext}"
+    path = UPLOADS_DIR / filename
+    if path.exists():
+        # Refresh the age GC goes by, so a reused file isn't collected before its recipe commits
+        os.utime(path)
+        Path(tmp).unlink(missing_ok=True)
+    else:
+        # mkstemp creates 0600; keep stored images readable like the files open() used to write
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    _register(filename, digest, size, conn)
+    return f"{URL_PREFIX}{filename}"
+
+
+def store_bytes(data: bytes, ext: str | None = None, conn: Connection | None = None) -> str:
+    """Store image bytes under their content hash and return the /api/uploads URL.
+
+    Writing is atomic (temp file + rename), so concurrent stores of the same image
+    and readers never see a partial file. Pass the session's connection when the
+    caller is mid-transaction, so the blob row is written (and rolled back) with it.
+    """
+    fd, tmp = _temp_file()
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+        digest = hashlib.sha256(data).hexdigest()
+        return _place(tmp, digest, sniff_extension(data) or ext or ".jpg", len(data), conn)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+async def store_upload(file: UploadFile, max_bytes: int, allowed: set[str]) -> str:
+    """Stream an upload into the store chunk by chunk and return its URL.
+
+    Memory stays at one chunk whatever the upload's size, disk work runs in the
+    threadpool, and the upload is abandoned as soon as it passes max_bytes. The
+    format comes from the leading bytes, not the client's filename.
+    Raises UploadTooLarge or UnsupportedImage.
+    """
+    fd, tmp = await run_in_threadpool(_temp_file)
+    out = os.fdopen(fd, "wb")
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        head = b""
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge()
+            if len(head) < 16:
+                head += chunk[:16 - len(head)]
+                if len(head) >= 16 and sniff_extension(head) not in allowed:
+                    raise UnsupportedImage()
+            digest.update(chunk)
+            await run_in_threadpool(out.write, chunk)
+        ext = sniff_extension(head)
+        if ext not in allowed:
+            raise UnsupportedImage()
+        await run_in_threadpool(out.close)
+        return await run_in_threadpool(_place, tmp, digest.hexdigest(), ext, size)
+    except BaseException:
+        out.close()
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_image_refs(session: Session, flush_context, instances) -> None:
+    """Net change in references per file from recipes being added, edited or deleted."""
+    deltas: dict[str, int] = session.info.setdefault("image_ref_deltas", {})
+
+    def bump(url: str | None, delta: int) -> None:
+        name = filename_for(url)
+        if name:
+            deltas[name] = deltas.get(name, 0) + delta
+
+    for obj in session.new:
+        if isinstance(obj, Recipe):
+            bump(obj.image_url, 1)
+    for obj in session.deleted:
+        if isinstance(obj, Recipe):
+            history = inspect(obj).attrs.image_url.history
+            for url in history.deleted or history.unchanged:
+                bump(url, -1)
+    for obj in session.dirty:
+        if isinstance(obj, Recipe):
+            history = inspect(obj).attrs.image_url.history
+            if history.has_changes():
+                for url in history.deleted:
+                    bump(url, -1)
+                for url in history.added:
+                    bump(url, 1)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_image_refs(session: Session, flush_context) -> None:
+    deltas = session.info.pop("image_ref_deltas", None)
+    if not deltas:
+        return
+    # Core statements in the flush's transaction: rolled back with it, and not a data write
+    conn = session.connection()
+    now = datetime.utcnow()
+    for filename, delta in deltas.items():
+        if delta:
+            count = ImageBlob.refcount + delta
+            conn.execute(
+                update(ImageBlob)
+                .where(ImageBlob.filename == filename)
+                .values(refcount=count, unreferenced_at=case((count <= 0, now), else_=None))
+            )
+
+
+_LEGACY_NAME = re.compile(r"^(?P<recipe_id>[0-9a-f-]{36})_[0-9a-f]{8}\.\w+$")
+
+
+def _orphaned_legacy_files(db: Session, cutoff: datetime) -> list[Path]:
+    """Old-style {recipe_id}_{random} files whose recipe now points at a different image.
+
+    Files for recipe ids this database doesn't know are left alone, so a fresh or
+    different database never wipes the uploads volume.
+    """
+    candidates: dict[str, list[Path]] = {}
+    for path in UPLOADS_DIR.iterdir():
+        m = _LEGACY_NAME.match(path.name)
+        if m and path.is_file() and datetime.utcfromtimestamp(path.stat().st_mtime) <= cutoff:
+            candidates.setdefault(m["recipe_id"], []).append(path)
+    orphans = []
+    ids = list(candidates)
+    for start in range(0, len(ids), 500):
+        rows = db.query(Recipe.id, Recipe.image_url).filter(Recipe.id.in_(ids[start:start + 500])).all()
+        for recipe_id, image_url in rows:
+            current = filename_for(image_url)
+            orphans += [p for p in candidates[recipe_id] if p.name != current]
+    return orphans
+
+
+def _reconcile_counts(db: Session) -> None:
+    """Re-derive every blob's count from the recipes table, correcting any drift."""
+    rows = (
+        db.query(Recipe.image_url, func.count())
+        .filter(Recipe.image_url.like(f"{URL_PREFIX}%"))
+        .group_by(Recipe.image_url)
+        .all()
+    )
+    referenced = {filename_for(url): count for url, count in rows}
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for blob in conn.execute(select(ImageBlob.filename, ImageBlob.refcount, ImageBlob.unreferenced_at)).all():
+            actual = referenced.get(blob.filename, 0)
+            if actual != blob.refcount or (actual == 0 and blob.unreferenced_at is None):
+                conn.execute(
+                    update(ImageBlob)
+                    .where(ImageBlob.filename == blob.filename)
+                    .values(refcount=actual, unreferenced_at=(blob.unreferenced_at or now) if actual == 0 else None)
+                )
+
+
+def collect_garbage(db: Session, grace_minutes: int | None = None) -> dict:
+    """Delete image files (and their variants) that no recipe references.
+
+    Stored images go once their count has been zero for the grace period; a store
+    happens before the recipe referencing it commits, so fresh files are never taken.
+    Old-style files go once their recipe has a different image.
+    """
+    grace = timedelta(minutes=settings.image_gc_grace_minutes if grace_minutes is None else grace_minutes)
+    cutoff = datetime.utcnow() - grace
+    _reconcile_counts(db)
+
+    with engine.connect() as conn:
+        unreferenced = conn.execute(
+            select(ImageBlob.filename).where(ImageBlob.refcount <= 0, ImageBlob.unreferenced_at <= cutoff)
+        ).scalars().all()
+
+    removed_files = 0
+    freed_bytes = 0
+    collected = []
+    paths = [UPLOADS_DIR / name for name in unreferenced]
+    if UPLOADS_DIR.is_dir():
+        paths += _orphaned_legacy_files(db, cutoff)
+    for path in paths:
+        if path.is_file():
+            stat = path.stat()
+            # A store since the count was read refreshed the mtime: the image is in use
+            # again, so leave it and its variants alone
+            if datetime.utcfromtimestamp(stat.st_mtime) > cutoff:
+                continue
+            path.unlink()
+            freed_bytes += stat.st_size
+            removed_files += 1
+        # Also clears variants left behind by an original that is already gone
+        delete_variants(path.name)
+        collected.append(path.name)
+
+    with engine.begin() as conn:
+        dropped = conn.execute(
+            delete(ImageBlob).where(
+                ImageBlob.filename.in_(collected), ImageBlob.refcount <= 0, ImageBlob.unreferenced_at <= cutoff
+            )
+        ).rowcount
+
+    if removed_files:
+        logger.info("Image GC removed %d file(s), %d bytes", removed_files, freed_bytes)
+    return {"removed_files": removed_files, "freed_bytes": freed_bytes, "dropped_blobs": dropped}
+
+
+def _legacy_image():
+    """Recipes whose image file predates the store (no image_blobs row)."""
+    stored = select(literal(URL_PREFIX) + ImageBlob.filename)
+    return Recipe.image_url.like(f"{URL_PREFIX}%") & ~Recipe.image_url.in_(stored)
+
+
+def adopt_legacy_images(db: Session, batch_size: int = 200) -> int:
+    """Move images stored under the old {recipe_id}_{random} names into the store.
+
+    Duplicates collapse onto one file; the old files become garbage for the next GC.
+    """
+    adopted = 0
+    last_id = ""
+    while True:
+        # Page by id: recipes whose file is missing stay legacy, and must not be re-selected
+        recipes = (
+            db.query(Recipe)
+            .filter(_legacy_image(), Recipe.id > last_id)
+            .order_by(Recipe.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not recipes:
+            break
+        for recipe in recipes:
+            last_id = recipe.id
+            path = UPLOADS_DIR / Path(recipe.image_url).name
+            if not path.is_file():
+                continue
+            recipe.image_url = store_bytes(path.read_bytes(), path.suffix)
+            recipe.image_variants = variants_json(recipe.image_url)
+            adopted += 1
+        db.commit()
+    return adopted
+
+
+def _directory_usage(directory: Path) -> dict:
+    files = [p for p in directory.iterdir() if p.is_file()] if directory.is_dir() else []
+    return {"files": len(files), "bytes": sum(p.stat().st_size for p in files)}
+
+
+def disk_usage(db: Session) -> dict:
+    """What the uploads volume holds, and how much deduplication saves."""
+    blobs, blob_bytes, unreferenced = db.query(
+        func.count(ImageBlob.filename),
+        func.coalesce(func.sum(ImageBlob.size_bytes), 0),
+        func.count(ImageBlob.filename).filter(ImageBlob.refcount <= 0),
+    ).one()
+    # Bytes we'd store if every reference had its own copy
+    undeduplicated = db.query(
+        func.coalesce(func.sum(ImageBlob.size_bytes * ImageBlob.refcount), 0)
+    ).filter(ImageBlob.refcount > 0).scalar()
+    referenced_bytes = db.query(
+        func.coalesce(func.sum(ImageBlob.size_bytes), 0)
+    ).filter(ImageBlob.refcount > 0).scalar()
+    return {
+        "originals": _directory_usage(UPLOADS_DIR),
+        "variants": _directory_usage(VARIANTS_DIR),
+        "blobs": {"count": blobs, "bytes": blob_bytes, "unreferenced": unreferenced},
+        "legacy_images": db.query(Recipe).filter(_legacy_image()).count(),
+        "dedup_saved_bytes": undeduplicated - referenced_bytes,
+    }
+
+
+def _gc_pass() -> dict | None:
+    # One process at a time; the others skip this round
+    owner = try_acquire(GC_LEASE, GC_LEASE_SECONDS)
+    if owner is None:
+        return None
+    db = SessionLocal()
+    try:
+        adopt_legacy_images(db)
+        return collect_garbage(db)
+    finally:
+        db.close()
+        release(GC_LEASE, owner)
+
+
+async def run_image_gc_scheduler() -> None:
+    """Adopt legacy images and remove unreferenced ones every image_gc_interval_hours."""
+    while True:
+        try:
+            await run_in_threadpool(_gc_pass)
+        except Exception as e:
+            logger.warning("Image garbage collection failed: %s", e)
+        await asyncio.sleep(settings.image_gc_interval_hours * 3600)
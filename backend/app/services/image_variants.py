@@ -0,0 +1,146 @@
+"""Downscaled variants of recipe images for grids and cards.
+
+Originals can be multi-megabyte uploads or full-size og:images; list views only need
+a few hundred pixels. Each stored image gets fixed-size variants next to it, and
+their URLs are kept on the recipe as JSON in ``Recipe.image_variants``.
+"""
+
+import json
+import logging
+import os
+import tempfile
+from collections.abc import Callable
+from pathlib import Path
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Recipe
+
+UPLOADS_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "uploads"
+VARIANTS_DIR = UPLOADS_DIR / "variants"
+
+logger = logging.getLogger(__name__)
+
+# name -> longest edge in pixels; aspect ratio is kept so clients can crop with object-fit
+VARIANTS = {"thumb": 320, "card": 800}
+
+# settings.image_variant_format -> (Pillow format, extension, save options)
+_FORMATS = {
+    "webp": ("WEBP", ".webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", ".jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def _local_path(image_url: str) -> Path:
+    return UPLOADS_DIR / Path(image_url).name
+
+
+def _variant_stem(image_url: str) -> str:
+    return Path(image_url).stem
+
+
+def _save_atomic(img: Image.Image, path: Path, fmt: str, options: dict) -> None:
+    # Temp file + rename: a crash mid-write must not leave a truncated file that the
+    # "all variants exist" shortcut would then serve forever
+    fd, tmp = tempfile.mkstemp(dir=VARIANTS_DIR, prefix=".incoming-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            img.save(out, fmt, **options)
+        # mkstemp creates 0600; variants are served like the originals
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def create_variants(image_url: str) -> dict[str, str] | None:
+    """Write every variant for a stored image and return {name: url}, or None if it can't be read."""
+    source = _local_path(image_url)
+    fmt, ext, options = _FORMATS.get(settings.image_variant_format, _FORMATS["webp"])
+    filenames = {name: f"{_variant_stem(image_url)}_{name}{ext}" for name in VARIANTS}
+    if all((VARIANTS_DIR / f).is_file() for f in filenames.values()):
+        # Content-addressed originals share variants: another recipe already made them
+        return {name: f"/api/uploads/variants/{f}" for name, f in filenames.items()}
+    try:
+        with Image.open(source) as img:
+            # JPEGs can be decoded straight at a reduced scale, which is most of the cost
+            largest = max(VARIANTS.values())
+            img.draft("RGB", (largest, largest))
+            # Apply camera rotation before the EXIF is dropped, and flatten alpha for JPEG
+            img = ImageOps.exif_transpose(img)
+            img = img.convert("RGBA" if fmt == "WEBP" and img.mode in ("RGBA", "LA", "P") else "RGB")
+            VARIANTS_DIR.mkdir(parents=True, exist_ok=True)
+            urls = {}
+            # Largest first, so each smaller variant is resampled from fewer pixels
+            for name, size in sorted(VARIANTS.items(), key=lambda v: -v[1]):
+                img.thumbnail((size, size), Image.Resampling.LANCZOS)
+                _save_atomic(img, VARIANTS_DIR / filenames[name], fmt, options)
+                urls[name] = f"/api/uploads/variants/{filenames[name]}"
+            return urls
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as e:
+        logger.warning("Could not create variants for %s: %s", image_url, e)
+        return None
+
+
+def variants_json(image_url: str | None) -> str | None:
+    """create_variants, encoded for Recipe.image_variants."""
+    if not image_url:
+        return None
+    variants = create_variants(image_url)
+    return json.dumps(variants) if variants else None
+
+
+def delete_variants(image_url: str | None) -> None:
+    """Remove an image's variants. Only for images no recipe references any more."""
+    if not image_url:
+        return
+    for path in VARIANTS_DIR.glob(f"{_variant_stem(image_url)}_*"):
+        path.unlink(missing_ok=True)
+
+
+def parse_variants(value: str | None) -> dict[str, str] | None:
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return None
+
+
+def backfill_image_variants(
+    db: Session,
+    checkpoint: dict | None = None,
+    on_progress: Callable[[int, int, dict], None] | None = None,
+) -> dict:
+    """Create variants for recipes that have an image but none yet, committing each.
+
+    Like backfill_recipe_images, recipes are visited in id order so the state passed
+    to on_progress(done, total, state) is a resumable checkpoint.
+    """
+    state = dict(checkpoint or {"after_id": "", "done": 0, "updated": 0, "failed": 0})
+    recipes = (
+        db.query(Recipe)
+        .filter(Recipe.image_url.is_not(None), Recipe.image_url != "", Recipe.image_variants.is_(None))
+        .filter(Recipe.id > state["after_id"])
+        .order_by(Recipe.id)
+        .all()
+    )
+    total = state["done"] + len(recipes)
+    for recipe in recipes:
+        if on_progress:
+            on_progress(state["done"], total, state)
+        variants = variants_json(recipe.image_url)
+        if variants:
+            recipe.image_variants = variants
+            db.commit()
+            state["updated"] += 1
+        else:
+            state["failed"] += 1
+        state["after_id"] = recipe.id
+        state["done"] += 1
+    if on_progress:
+        on_progress(state["done"], total, state)
+    return {"total": total, "updated": state["updated"], "failed": state["failed"]}
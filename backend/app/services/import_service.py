@@ -1,25 +1,26 @@
+import asyncio
 import json
 import logging
-import uuid
-from pathlib import Path
 from urllib.parse import urljoin
 
 import anthropic
 import httpx
 from bs4 import BeautifulSoup
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.models import Recipe
+from app.services import extraction_cache, http_client, llm_gateway
 from app.services.claude_service import _extract_json, normalize_recipe
-
-from app.config import settings
-
-UPLOADS_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "uploads"
+from app.services.image_service import mark_pending, schedule_image_fetches
+from app.services.structured_recipe import extract_structured_recipes
+from app.services.text_chunker import chunk_text
 
 logger = logging.getLogger(__name__)
 
-client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
+# Bump when IMPORT_SYSTEM_PROMPT or the extraction prompt change, so cached extractions are not reused
+IMPORT_PROMPT_VERSION = 1
 
 IMPORT_SYSTEM_PROMPT = """You are a recipe extraction assistant. Given raw text content (from a webpage or a text file),
 extract all recipes found in the text. Always respond with valid JSON only — no markdown, no extra text.
@@ -50,21 +51,12 @@ Important rules:
 - If the text contains no recognizable recipe, return an empty array []"""
 
 
-def _parse_recipe_with_claude(text: str, source: str) -> list[dict]:
-    """Send text to Claude to extract structured recipe data."""
-    # Truncate very long text to stay within token limits
-    if len(text) > 30000:
-        text = text[:30000]
-
+async def _extract_chunk(text: str, source: str) -> list[dict]:
+    """Send one piece of text to Claude to extract structured recipe data."""
     user_prompt = f"Extract all recipes from the following content (source: {source}):\n\n{text}"
 
     try:
-        message = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=4096,
-            system=IMPORT_SYSTEM_PROMPT,
-            messages=[{"role": "user", "content": user_prompt}],
-        )
+        message = await llm_gateway.acomplete("import", IMPORT_SYSTEM_PROMPT, user_prompt, max_tokens=4096)
         raw_text = message.content[0].text
         logger.info("Claude import response (first 200 chars): %s", raw_text[:200])
         cleaned = _extract_json(raw_text)
@@ -77,39 +69,63 @@ def _parse_recipe_with_claude(text: str, source: str) -> list[dict]:
         raise
 
 
-def search_recipe_image(recipe_name: str, recipe_id: str) -> tuple[str | None, str | None]:
-    """Search Pexels for a food photo matching the recipe name and download it.
-    Returns (local_url_path, error_string). One of the two will be None."""
-    if not settings.pexels_api_key:
-        return None, "no_api_key"
-
-    try:
-        resp = httpx.get(
-            "https://api.pexels.com/v1/search",
-            params={"query": f"{recipe_name} food", "per_page": 1, "orientation": "landscape"},
-            headers={"Authorization": settings.pexels_api_key},
-            timeout=10,
-        )
-        resp.raise_for_status()
-        photos = resp.json().get("photos", [])
-        if not photos:
-            return None, "no_photos_returned"
-
-        # Use the medium-sized image (good balance of quality/size)
-        image_url = photos[0].get("src", {}).get("medium")
-        if not image_url:
-            return None, "no_medium_src"
-
-        path = _download_image(image_url, recipe_id)
-        if not path:
-            return None, "download_failed"
-        return path, None
-    except httpx.HTTPStatusError as e:
-        logger.warning("Pexels API error for '%s': %s %s", recipe_name, e.response.status_code, e.response.text[:200])
-        return None, f"pexels_http_{e.response.status_code}"
-    except Exception as e:
-        logger.warning("Pexels image search failed for '%s': %s", recipe_name, e)
-        return None, f"{type(e).__name__}: {e}"
+def _merge_recipes(batches: list[list[dict]]) -> list[dict]:
+    """Combine per-chunk results, keeping the most complete copy of recipes seen in overlaps."""
+    merged: dict[str, dict] = {}
+    for recipes in batches:
+        for recipe in recipes:
+            key = " ".join(str(recipe.get("name") or "").lower().split())
+            if not key:
+                continue
+            size = len(recipe.get("ingredients") or "") + len(recipe.get("directions") or "")
+            current = merged.get(key)
+            if current is None or size > len(current.get("ingredients") or "") + len(current.get("directions") or ""):
+                merged[key] = recipe
+    return list(merged.values())
+
+
+async def _parse_recipe_with_claude(text: str, source: str) -> tuple[list[dict], int]:
+    """Extract recipes from text of any length. Returns (recipes, number of chunks that failed).
+
+    Long text is split at recipe boundaries and the chunks are extracted concurrently,
+    so wall time grows with chunks / import_max_concurrency rather than with size.
+    Raises only if every chunk failed.
+    """
+    chunks = chunk_text(text, settings.import_chunk_tokens, settings.import_chunk_overlap_tokens)
+    if len(chunks) == 1:
+        return await _extract_chunk(text, source), 0
+
+    logger.info("Importing %s in %d chunks", source, len(chunks))
+    semaphore = asyncio.Semaphore(settings.import_max_concurrency)
+
+    async def extract(i: int, chunk: str) -> list[dict]:
+        async with semaphore:
+            return await _extract_chunk(chunk, f"{source}, part {i + 1} of {len(chunks)}")
+
+    results = await asyncio.gather(*(extract(i, c) for i, c in enumerate(chunks)), return_exceptions=True)
+    failures = [r for r in results if isinstance(r, BaseException)]
+    if len(failures) == len(results):
+        raise failures[0]
+    if failures:
+        logger.warning("%d of %d chunks of %s failed to import", len(failures), len(chunks), source)
+    return _merge_recipes([r for r in results if not isinstance(r, BaseException)]), len(failures)
+
+
+async def _extract_recipes(db: Session, text: str, source: str) -> tuple[list[dict], int]:
+    """_parse_recipe_with_claude, reusing the previous result when the same content was extracted before.
+
+    Only complete extractions are cached, so importing the content again retries failed chunks.
+    """
+    key = extraction_cache.extraction_key(text, IMPORT_PROMPT_VERSION, llm_gateway.MODEL)
+    cached = await run_in_threadpool(extraction_cache.lookup, db, key)
+    if cached is not None:
+        logger.info("Extraction cache hit for %s", source)
+        return cached, 0
+
+    recipes, failed_chunks = await _parse_recipe_with_claude(text, source)
+    if not failed_chunks:
+        await run_in_threadpool(extraction_cache.store, db, key, text, recipes, source)
+    return recipes, failed_chunks
 
 
 def _find_recipe_image_url(soup: BeautifulSoup, base_url: str) -> str | None:
@@ -145,48 +161,11 @@ def _find_recipe_image_url(soup: BeautifulSoup, base_url: str) -> str | None:
     return None
 
 
-def _download_image(image_url: str, recipe_id: str) -> str | None:
-    """Download an image and save it to uploads. Returns the local URL path or None."""
-    try:
-        resp = httpx.get(image_url, follow_redirects=True, timeout=15, headers={
-            "User-Agent": "Mozilla/5.0 (compatible; RecipeFinder/1.0)"
-        })
-        resp.raise_for_status()
-
-        content_type = resp.headers.get("content-type", "")
-        if "jpeg" in content_type or "jpg" in content_type:
-            ext = ".jpg"
-        elif "png" in content_type:
-            ext = ".png"
-        elif "webp" in content_type:
-            ext = ".webp"
-        else:
-            # Try to guess from URL
-            url_lower = image_url.lower().split("?")[0]
-            if url_lower.endswith(".png"):
-                ext = ".png"
-            elif url_lower.endswith(".webp"):
-                ext = ".webp"
-            else:
-                ext = ".jpg"
-
-        if len(resp.content) > 5 * 1024 * 1024:
-            logger.warning("Image too large, skipping: %s", image_url)
-            return None
-
-        UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
-        filename = f"{recipe_id}_{uuid.uuid4().hex[:8]}{ext}"
-        (UPLOADS_DIR / filename).write_bytes(resp.content)
-        return f"/api/uploads/{filename}"
-    except Exception as e:
-        logger.warning("Failed to download image %s: %s", image_url, e)
-        return None
-
-
 def _save_parsed_recipes(db: Session, recipes: list[dict], source: str, image_url: str | None = None) -> dict:
     """Save parsed recipe dicts to the database. Returns {imported, skipped} counts."""
     imported = 0
     skipped = 0
+    saved = []
 
     for data in recipes:
         name = data.get("name", "").strip()
@@ -216,69 +195,107 @@ def _save_parsed_recipes(db: Session, recipes: list[dict], source: str, image_ur
             cuisine=data.get("cuisine"),
             ai_generated=False,
         )
+        mark_pending(recipe)
         db.add(recipe)
-        db.flush()  # get recipe.id for image filename
-
-        # Download image from source HTML (URL imports)
-        if image_url and imported == 0:
-            local_path = _download_image(image_url, recipe.id)
-            if local_path:
-                recipe.image_url = local_path
-
-        # Fall back to Pexels if no image was set
-        if not recipe.image_url:
-            pexels_path, _ = search_recipe_image(name, recipe.id)
-            if pexels_path:
-                recipe.image_url = pexels_path
-
+        saved.append(recipe)
         imported += 1
 
     db.commit()
+    # The source page's own image goes to the first recipe; the rest fall back to Pexels
+    schedule_image_fetches(saved, source_image_url=image_url)
     return {"imported": imported, "skipped": skipped}
 
 
-def import_from_url(db: Session, url: str) -> dict:
-    """Fetch a URL, extract text, parse recipes with Claude, and save to DB."""
-    try:
-        response = httpx.get(url, follow_redirects=True, timeout=30, headers={
-            "User-Agent": "Mozilla/5.0 (compatible; RecipeFinder/1.0)"
-        })
-        response.raise_for_status()
-    except httpx.HTTPError as e:
-        raise ValueError(f"Failed to fetch URL: {e}")
+def _extract_page(html: str, url: str) -> tuple[str | None, str, list[dict]]:
+    """Parse fetched HTML into (recipe image URL, visible text, schema.org recipes)."""
+    soup = BeautifulSoup(html, "html.parser")
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    # Structured data lives in script tags, so read it before they are stripped
+    structured = extract_structured_recipes(soup, url)
+    image_url = _find_recipe_image_url(soup, url)
 
     # Remove script and style elements
     for tag in soup(["script", "style", "nav", "footer", "header"]):
         tag.decompose()
 
-    # Extract image URL before stripping tags
-    image_url = _find_recipe_image_url(soup, url)
+    return image_url, soup.get_text(separator="\n", strip=True), structured
+
 
-    text = soup.get_text(separator="\n", strip=True)
+async def import_from_url(db: Session, url: str) -> dict:
+    """Fetch a URL, extract its recipes and save them to the DB.
 
-    if not text.strip():
-        raise ValueError("No text content found at URL")
+    Pages that publish schema.org Recipe data are mapped directly; Claude is only
+    asked to read the page text when there is none, and not again for text it has
+    already seen. Refetches are conditional on the stored ETag/Last-Modified. Network and Claude calls are
+    awaited; HTML parsing and the DB/image work run in the threadpool so a slow
+    import never blocks the event loop.
+    """
+    previous = await run_in_threadpool(extraction_cache.get_source, db, url)
+    try:
+        response = await http_client.async_client.get(
+            url, headers=extraction_cache.conditional_headers(previous), timeout=30
+        )
+        if response.status_code != 304:
+            response.raise_for_status()
+    except httpx.HTTPError as e:
+        raise ValueError(f"Failed to fetch URL: {e}")
+
+    if response.status_code == 304 and previous is not None:
+        extraction_cache.counters.record_not_modified()
+        html = previous.body
+    else:
+        html = response.text
+        await run_in_threadpool(
+            extraction_cache.store_source, db, url, html,
+            response.headers.get("etag"), response.headers.get("last-modified"),
+        )
+
+    image_url, text, structured = await run_in_threadpool(_extract_page, html, url)
+
+    failed_chunks = 0
+    if structured:
+        logger.info("Using schema.org data for %s (%d recipes)", url, len(structured))
+        recipes = structured
+        image_url = next((r["image"] for r in structured if r.get("image")), image_url)
+    else:
+        if not text.strip():
+            raise ValueError("No text content found at URL")
+        recipes, failed_chunks = await _extract_recipes(db, text, url)
 
-    recipes = _parse_recipe_with_claude(text, url)
     if not recipes:
         return {"imported": 0, "skipped": 0, "message": "No recipes found at that URL"}
 
-    result = _save_parsed_recipes(db, recipes, url, image_url=image_url)
-    result["message"] = f"Imported {result['imported']} recipes, skipped {result['skipped']} duplicates"
+    result = await run_in_threadpool(_save_parsed_recipes, db, recipes, url, image_url)
+    result["failed_chunks"] = failed_chunks
+    result["message"] = summarize_import(result["imported"], result["skipped"], failed_chunks=failed_chunks)
+    result["structured"] = bool(structured)
     return result
 
 
-def import_from_text(db: Session, filename: str, content: str) -> dict:
+def summarize_import(
+    imported: int, skipped: int, errors: list[str] | None = None, failed_chunks: int = 0
+) -> str:
+    message = f"Imported {imported} recipes, skipped {skipped} duplicates"
+    if failed_chunks:
+        message += (
+            f". {failed_chunks} part(s) of the text could not be read, so some recipes may be missing;"
+            " import it again to retry"
+        )
+    if errors:
+        message += f". Errors: {'; '.join(errors)}"
+    return message
+
+
+async def import_from_text(db: Session, filename: str, content: str) -> dict:
     """Parse recipes from text/markdown content with Claude and save to DB."""
     if not content.strip():
         return {"imported": 0, "skipped": 0, "message": f"File '{filename}' was empty"}
 
-    recipes = _parse_recipe_with_claude(content, filename)
+    recipes, failed_chunks = await _extract_recipes(db, content, filename)
     if not recipes:
         return {"imported": 0, "skipped": 0, "message": f"No recipes found in '{filename}'"}
 
-    result = _save_parsed_recipes(db, recipes, filename)
-    result["message"] = f"Imported {result['imported']} recipes, skipped {result['skipped']} duplicates"
+    result = await run_in_threadpool(_save_parsed_recipes, db, recipes, filename)
+    result["failed_chunks"] = failed_chunks
+    result["message"] = summarize_import(result["imported"], result["skipped"], failed_chunks=failed_chunks)
     return result
@@ -0,0 +1,151 @@
+import re
+
+_UNICODE_FRACTIONS = {
+    "½": 0.5, "⅓": 1 / 3, "⅔": 2 / 3, "¼": 0.25, "¾": 0.75, "⅕": 0.2, "⅖": 0.4,
+    "⅗": 0.6, "⅘": 0.8, "⅙": 1 / 6, "⅚": 5 / 6, "⅛": 0.125, "⅜": 0.375, "⅝": 0.625,
+    "⅞": 0.875,
+}
+
+UNIT_ALIASES = {
+    "c": "cup", "cup": "cup", "cups": "cup",
+    "tbsp": "tbsp", "tbs": "tbsp", "tbl": "tbsp", "tablespoon": "tbsp", "tablespoons": "tbsp",
+    "tsp": "tsp", "teaspoon": "tsp", "teaspoons": "tsp",
+    "oz": "oz", "ounce": "oz", "ounces": "oz",
+    "lb": "lb", "lbs": "lb", "pound": "lb", "pounds": "lb",
+    "g": "g", "gram": "g", "grams": "g", "kg": "kg", "kilogram": "kg", "kilograms": "kg",
+    "ml": "ml", "milliliter": "ml", "milliliters": "ml", "millilitre": "ml", "millilitres": "ml",
+    "l": "l", "liter": "l", "liters": "l", "litre": "l", "litres": "l",
+    "qt": "quart", "quart": "quart", "quarts": "quart",
+    "pt": "pint", "pint": "pint", "pints": "pint",
+    "pinch": "pinch", "pinches": "pinch", "dash": "dash", "dashes": "dash",
+    "clove": "clove", "cloves": "clove", "can": "can", "cans": "can",
+    "jar": "jar", "jars": "jar", "bag": "bag", "bags": "bag",
+    "package": "package", "packages": "package", "pkg": "package",
+    "slice": "slice", "slices": "slice", "stick": "stick", "sticks": "stick",
+    "bunch": "bunch", "bunches": "bunch", "handful": "handful", "handfuls": "handful",
+    "piece": "piece", "pieces": "piece", "sprig": "sprig", "sprigs": "sprig",
+    "head": "head", "heads": "head",
+}
+
+# Words that describe the state or size of an ingredient; moved into the note
+_PREP_WORDS = {
+    "beaten", "boneless", "chilled", "chopped", "coarsely", "cooked", "crumbled", "crushed",
+    "cubed", "diced", "divided", "drained", "dried", "extra", "finely", "fresh", "freshly",
+    "frozen", "grated", "halved", "julienned", "large", "lightly", "medium", "melted",
+    "minced", "packed", "peeled", "quartered", "raw", "rinsed", "roughly", "shredded",
+    "skinless", "sliced", "small", "softened", "thawed", "thinly", "toasted", "trimmed",
+    "virgin", "whole",
+}
+
+# Filler words dropped from the canonical name
+_FILLER_WORDS = {"a", "an", "and", "about", "for", "of", "optional", "or", "plus", "more", "taste", "the", "to"}
+
+_NUMBER = r"(?:\d+\s+\d+/\d+|\d+/\d+|\d*\.\d+|\d+\s*[½⅓⅔¼¾⅕⅖⅗⅘⅙⅚⅛⅜⅝⅞]|\d+|[½⅓⅔¼¾⅕⅖⅗⅘⅙⅚⅛⅜⅝⅞])"
+_QUANTITY_RE = re.compile(rf"^\s*({_NUMBER})(?:\s*(?:-|–|to)\s*({_NUMBER}))?\s*")
+
+
+def _parse_number(text: str) -> float:
+    text = text.strip()
+    total = 0.0
+    for char, value in _UNICODE_FRACTIONS.items():
+        if char in text:
+            total += value
+            text = text.replace(char, "").strip()
+    for part in text.split():
+        if "/" in part:
+            num, den = part.split("/", 1)
+            total += float(num) / float(den) if float(den) else 0.0
+        elif part:
+            total += float(part)
+    return total
+
+
+def singularize(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("oes"):
+        return word[:-2]
+    if word.endswith(("ches", "shes", "sses")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us")):
+        return word[:-1]
+    return word
+
+
+def canonical_name(text: str) -> str:
+    """Lowercase, singular ingredient name with quantities and descriptors removed."""
+    words = re.findall(r"[a-z]+", text.lower())
+    kept = [
+        singularize(w) for w in words
+        if w not in _PREP_WORDS and w not in _FILLER_WORDS and w not in UNIT_ALIASES and len(w) > 1
+    ]
+    return " ".join(kept)
+
+
+def parse_ingredient_line(line: str) -> dict | None:
+    """Split one ingredient line into quantity, unit, canonical name and preparation note.
+
+    Returns None for blank lines and section headers such as "For the sauce:".
+    """
+    raw = line.strip().lstrip("-*•").strip()
+    if not raw or raw.endswith(":"):
+        return None
+
+    rest = raw
+    quantity = quantity_max = None
+    m = _QUANTITY_RE.match(rest)
+    if m:
+        try:
+            quantity = _parse_number(m.group(1))
+            quantity_max = _parse_number(m.group(2)) if m.group(2) else None
+        except (ValueError, ZeroDivisionError):
+            quantity = quantity_max = None
+        rest = rest[m.end():]
+
+    notes = []
+    # Parentheticals are package sizes or asides: "1 (14 oz) can tomatoes"
+    notes += [p.strip() for p in re.findall(r"\(([^)]*)\)", rest) if p.strip()]
+    rest = re.sub(r"\([^)]*\)", " ", rest)
+
+    if "," in rest:
+        rest, tail = rest.split(",", 1)
+        if tail.strip():
+            notes.append(tail.strip())
+
+    words = rest.split()
+    unit = None
+    prep = []
+    kept = []
+    for word in words:
+        bare = word.lower().rstrip(".")
+        if unit is None and not kept and bare in UNIT_ALIASES:
+            unit = UNIT_ALIASES[bare]
+        elif bare in _PREP_WORDS:
+            prep.append(bare)
+        else:
+            kept.append(word)
+    if prep:
+        notes.insert(0, " ".join(prep))
+
+    name = canonical_name(" ".join(kept))
+    if not name:
+        return None
+
+    return {
+        "raw": raw,
+        "quantity": quantity,
+        "quantity_max": quantity_max,
+        "unit": unit,
+        "name": name,
+        "note": "; ".join(notes) or None,
+    }
+
+
+def parse_ingredients(text: str | None) -> list[dict]:
+    """Parse a newline-separated ingredients blob, skipping headers and blank lines."""
+    parsed = []
+    for line in (text or "").split("\n"):
+        item = parse_ingredient_line(line)
+        if item:
+            parsed.append(item)
+    return parsed
@@ -0,0 +1,95 @@
+import logging
+from collections.abc import Callable
+from datetime import datetime
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models import Recipe, RecipeIngredient
+from app.services.ingredient_parser import parse_ingredients
+
+logger = logging.getLogger(__name__)
+
+
+def build_recipe_ingredients(ingredients: str | None) -> list[RecipeIngredient]:
+    return [
+        RecipeIngredient(position=i, **item)
+        for i, item in enumerate(parse_ingredients(ingredients))
+    ]
+
+
+@event.listens_for(Session, "before_flush")
+def _sync_recipe_ingredients(session: Session, flush_context, instances) -> None:
+    """Re-parse Recipe.ingredients into recipe_ingredients whenever a recipe is created or edited.
+
+    Covers every write path (generate, URL/file import, Paprika import, daily
+    suggestions) without each one having to remember to do it.
+    """
+    for obj in session.new:
+        if isinstance(obj, Recipe):
+            if not obj.parsed_ingredients:
+                obj.parsed_ingredients = build_recipe_ingredients(obj.ingredients)
+            obj.ingredients_parsed_at = datetime.utcnow()
+    for obj in session.dirty:
+        if isinstance(obj, Recipe) and inspect(obj).attrs.ingredients.history.has_changes():
+            obj.parsed_ingredients = build_recipe_ingredients(obj.ingredients)
+            obj.ingredients_parsed_at = datetime.utcnow()
+
+
+def backfill_recipe_ingredients(
+    db: Session,
+    batch_size: int = 500,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> int:
+    """Parse ingredients for recipes never parsed yet. Returns the number processed.
+
+    Each recipe is marked with ingredients_parsed_at, so one whose ingredients parse
+    to no lines isn't picked up again on every run. on_progress(done, total) is
+    called after every committed batch.
+    """
+    unparsed = Recipe.ingredients_parsed_at.is_(None)
+    total = db.query(Recipe.id).filter(unparsed).count() if on_progress else 0
+    processed = 0
+    last_id = ""
+    while True:
+        batch = (
+            db.query(Recipe.id, Recipe.ingredients)
+            .filter(unparsed, Recipe.id > last_id)
+            .order_by(Recipe.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+        for recipe_id, ingredients in batch:
+            for item in build_recipe_ingredients(ingredients):
+                item.recipe_id = recipe_id
+                db.add(item)
+        db.query(Recipe).filter(Recipe.id.in_([row.id for row in batch])).update(
+            {Recipe.ingredients_parsed_at: datetime.utcnow()}, synchronize_session=False
+        )
+        db.commit()
+        processed += len(batch)
+        last_id = batch[-1].id
+        if on_progress:
+            on_progress(processed, max(total, processed))
+    if processed:
+        logger.info("Backfilled parsed ingredients for %d recipes", processed)
+    return processed
+
+
+if __name__ == "__main__":
+    import sys
+
+    from app.database import Base, SessionLocal, engine
+
+    if sys.argv[1:] != ["backfill"]:
+        print("usage: python -m app.services.ingredient_service backfill")
+        sys.exit(2)
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print(f"Backfilled {backfill_recipe_ingredients(db)} recipes")
+    finally:
+        db.close()
@@ -0,0 +1,114 @@
+"""Background job kinds. Importing this module registers them with the job queue."""
+
+from pathlib import Path
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.database import SessionLocal
+from app.services.image_service import backfill_recipe_images
+from app.services.image_variants import backfill_image_variants
+from app.services.import_service import (
+    import_from_text,
+    import_from_url,
+    summarize_import,
+)
+from app.services.ingredient_service import backfill_recipe_ingredients
+from app.services.job_queue import JobContext, handler
+from app.services.paprika_service import import_paprika
+
+
+@handler("import_files")
+async def import_files_job(ctx: JobContext) -> dict:
+    """payload: {"files": [{"name", "path"}], "errors": [...]}; resumes after the last finished file."""
+    files = ctx.payload["files"]
+    state = ctx.checkpoint or {
+        "next": 0, "imported": 0, "skipped": 0, "failed_chunks": 0, "errors": list(ctx.payload.get("errors", [])),
+    }
+    db = SessionLocal()
+    try:
+        for i in range(state["next"], len(files)):
+            await run_in_threadpool(ctx.report, i, len(files), state)
+            name = files[i]["name"]
+            try:
+                content = Path(files[i]["path"]).read_text(encoding="utf-8")
+                result = await import_from_text(db, name, content)
+                state["imported"] += result["imported"]
+                state["skipped"] += result["skipped"]
+                state["failed_chunks"] = state.get("failed_chunks", 0) + result.get("failed_chunks", 0)
+            except UnicodeDecodeError:
+                state["errors"].append(f"Skipped '{name}': could not decode as UTF-8")
+            except Exception as e:
+                db.rollback()
+                state["errors"].append(f"Error processing '{name}': {e}")
+            state["next"] = i + 1
+        await run_in_threadpool(ctx.report, len(files), len(files), state)
+    finally:
+        db.close()
+
+    failed_chunks = state.get("failed_chunks", 0)
+    return {
+        "imported": state["imported"],
+        "skipped": state["skipped"],
+        "failed_chunks": failed_chunks,
+        "message": summarize_import(state["imported"], state["skipped"], state["errors"], failed_chunks),
+    }
+
+
+@handler("import_url")
+async def import_url_job(ctx: JobContext) -> dict:
+    """payload: {"url"}. Re-running is cheap thanks to the extraction cache, so it resumes from scratch."""
+    db = SessionLocal()
+    try:
+        await run_in_threadpool(ctx.report, 0, 1)
+        result = await import_from_url(db, ctx.payload["url"])
+        await run_in_threadpool(ctx.report, 1, 1)
+        return result
+    finally:
+        db.close()
+
+
+@handler("paprika_import")
+def paprika_import_job(ctx: JobContext) -> dict:
+    """payload: {"path"}. Recipes are committed as progress is reported, so a resumed job continues."""
+    db = SessionLocal()
+    try:
+        archive = Path(ctx.payload["path"]).read_bytes()
+        result = import_paprika(db, archive, ctx.checkpoint, on_progress=ctx.report)
+        ctx.report(result["imported"] + result["skipped"])
+        return {
+            "imported": result["imported"],
+            "skipped": result["skipped"],
+            "message": summarize_import(result["imported"], result["skipped"]),
+        }
+    finally:
+        db.close()
+
+
+@handler("backfill_images")
+def backfill_images_job(ctx: JobContext) -> dict:
+    db = SessionLocal()
+    try:
+        return backfill_recipe_images(db, ctx.checkpoint, on_progress=ctx.report)
+    finally:
+        db.close()
+
+
+@handler("backfill_image_variants")
+def backfill_image_variants_job(ctx: JobContext) -> dict:
+    db = SessionLocal()
+    try:
+        return backfill_image_variants(db, ctx.checkpoint, on_progress=ctx.report)
+    finally:
+        db.close()
+
+
+@handler("backfill_ingredients")
+def backfill_ingredients_job(ctx: JobContext) -> dict:
+    db = SessionLocal()
+    try:
+        ctx.report(0)
+        processed = backfill_recipe_ingredients(db, on_progress=ctx.report)
+        ctx.report(processed, processed)
+        return {"processed": processed}
+    finally:
+        db.close()
@@ -0,0 +1,340 @@
+"""In-process background jobs backed by the ``jobs`` table.
+
+Handlers are registered per kind with ``@handler("kind")`` and receive a JobContext.
+Sync handlers run in the threadpool, async ones on the loop. A handler reports
+progress through ``ctx.report``, which also persists its checkpoint and raises
+JobCancelled once cancellation was requested. A job whose worker stops
+heartbeating (crash, restart) is queued again and resumes from its checkpoint,
+until it has been claimed job_max_attempts times.
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import shutil
+import threading
+import uuid
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models import Job
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "jobs"
+
+TERMINAL_STATUSES = {"succeeded", "failed", "cancelled"}
+
+_handlers: dict[str, Callable] = {}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def handler(kind: str) -> Callable[[Callable], Callable]:
+    def register(fn: Callable) -> Callable:
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def job_kinds() -> list[str]:
+    return sorted(_handlers)
+
+
+def files_dir(job_id: str) -> Path:
+    """Where a job keeps its uploaded inputs until it finishes."""
+    return JOBS_DIR / job_id
+
+
+def new_job_id() -> str:
+    return str(uuid.uuid4())
+
+
+async def save_upload(job_id: str, file: UploadFile, name: str) -> str:
+    """Copy an upload into the job's input directory and return the stored path."""
+    path = files_dir(job_id) / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as out:
+        await run_in_threadpool(shutil.copyfileobj, file.file, out)
+    return str(path)
+
+
+class JobContext:
+    def __init__(self, job_id: str, payload: dict, checkpoint: dict | None):
+        self.job_id = job_id
+        self.payload = payload
+        self.checkpoint = checkpoint
+        # Sync handlers run in a thread, which task cancellation can't reach: the queue
+        # sets this flag instead and report() turns it into JobCancelled
+        self.threaded = False
+        self.cancelled = threading.Event()
+
+    def report(self, done: int, total: int | None = None, checkpoint: dict | None = None) -> None:
+        """Persist progress (and the checkpoint to resume from); raise JobCancelled if asked to stop.
+
+        Blocking; async handlers should call it through run_in_threadpool.
+        """
+        values = {"progress_done": done, "heartbeat_at": datetime.utcnow()}
+        if total is not None:
+            values["progress_total"] = total
+        if checkpoint is not None:
+            self.checkpoint = checkpoint
+            values["checkpoint"] = json.dumps(checkpoint)
+        with engine.begin() as conn:
+            conn.execute(update(Job).where(Job.id == self.job_id).values(**values))
+            cancel = conn.execute(select(Job.cancel_requested).where(Job.id == self.job_id)).scalar()
+        if cancel or self.cancelled.is_set():
+            raise JobCancelled()
+
+
+# Job bookkeeping goes through Core statements on its own connection, so it neither
+# shares a request's transaction nor counts as a data write for the response cache
+
+def _set(job_id: str, **values) -> None:
+    with engine.begin() as conn:
+        conn.execute(update(Job).where(Job.id == job_id).values(**values))
+
+
+def submit(kind: str, payload: dict | None = None, job_id: str | None = None) -> str:
+    """Queue a job and return its id. Pass job_id when inputs were already stored under files_dir."""
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind: {kind}")
+    values = {"kind": kind, "status": "queued", "payload": json.dumps(payload or {}), "created_at": datetime.utcnow()}
+    if job_id:
+        values["id"] = job_id
+    with engine.begin() as conn:
+        job_id = conn.execute(insert(Job).values(**values).returning(Job.id)).scalar_one()
+    job_queue.wake()
+    return job_id
+
+
+def request_cancel(job_id: str) -> bool:
+    """Cancel a queued job now, or ask a running one to stop. False if it already finished."""
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        dequeued = conn.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "queued")
+            .values(status="cancelled", cancel_requested=True, finished_at=now)
+        ).rowcount
+        signalled = conn.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "running")
+            .values(cancel_requested=True)
+        ).rowcount
+    if dequeued:
+        shutil.rmtree(files_dir(job_id), ignore_errors=True)
+    if signalled:
+        job_queue.cancel_local(job_id)
+    return bool(dequeued or signalled)
+
+
+def get_job(db: Session, job_id: str) -> Job | None:
+    return db.get(Job, job_id)
+
+
+def list_jobs(db: Session, status: str | None = None, limit: int = 50) -> list[Job]:
+    query = db.query(Job)
+    if status:
+        query = query.filter(Job.status == status)
+    return query.order_by(Job.created_at.desc()).limit(limit).all()
+
+
+def _claim() -> Job | None:
+    """Atomically move the oldest queued job to running; safe across processes."""
+    while True:
+        with engine.begin() as conn:
+            row = conn.execute(
+                select(Job.id, Job.started_at).where(Job.status == "queued").order_by(Job.created_at).limit(1)
+            ).first()
+            if row is None:
+                return None
+            now = datetime.utcnow()
+            claimed = conn.execute(
+                update(Job)
+                .where(Job.id == row.id, Job.status == "queued")
+                .values(
+                    status="running",
+                    started_at=row.started_at or now,
+                    heartbeat_at=now,
+                    attempts=Job.attempts + 1,
+                )
+            ).rowcount
+        if claimed:
+            db = SessionLocal()
+            try:
+                job = db.get(Job, row.id)
+                db.expunge(job)
+                return job
+            finally:
+                db.close()
+
+
+def _requeue_stale() -> int:
+    """Queue running jobs whose worker stopped heartbeating, so they resume elsewhere.
+
+    A job that already used up job_max_attempts is failed instead, so one that keeps
+    killing its worker doesn't loop forever.
+    """
+    now = datetime.utcnow()
+    stale = (Job.status == "running", Job.heartbeat_at < now - timedelta(seconds=settings.job_stale_seconds))
+    with engine.begin() as conn:
+        failed = conn.execute(
+            update(Job)
+            .where(*stale, Job.attempts >= settings.job_max_attempts)
+            .values(status="failed", error=f"Gave up after {settings.job_max_attempts} attempts", finished_at=now)
+            .returning(Job.id)
+        ).scalars().all()
+        count = conn.execute(update(Job).where(*stale).values(status="queued")).rowcount
+    for job_id in failed:
+        shutil.rmtree(files_dir(job_id), ignore_errors=True)
+    if failed:
+        logger.warning("Failed %d stale job(s) out of attempts", len(failed))
+    if count:
+        logger.warning("Re-queued %d stale job(s)", count)
+    return count
+
+
+class JobQueue:
+    """Worker pool that runs queued jobs on the app's event loop."""
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._running: dict[str, tuple[asyncio.Task, JobContext]] = {}
+        self._lock = threading.Lock()
+        self._stopping = False
+
+    def start(self, workers: int | None = None) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(workers or settings.job_workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def wake(self) -> None:
+        # Called from request threads; the event belongs to the loop
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def cancel_local(self, job_id: str) -> None:
+        with self._lock:
+            task, ctx = self._running.get(job_id, (None, None))
+        if ctx is not None:
+            # A threaded handler stops at its next report; _run waits for it to return
+            ctx.cancelled.set()
+        if task is not None and self._loop is not None and not ctx.threaded:
+            self._loop.call_soon_threadsafe(task.cancel)
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                job = await run_in_threadpool(_claim)
+            except Exception as e:
+                logger.warning("Failed to claim a job: %s", e)
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.job_poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _heartbeat(self) -> None:
+        interval = max(settings.job_stale_seconds / 4, 1)
+        while True:
+            await asyncio.sleep(interval)
+            with self._lock:
+                running = list(self._running)
+            try:
+                if running:
+                    await run_in_threadpool(self._touch, running)
+                await run_in_threadpool(_requeue_stale)
+            except Exception as e:
+                logger.warning("Job heartbeat failed: %s", e)
+
+    @staticmethod
+    def _touch(job_ids: list[str]) -> None:
+        with engine.begin() as conn:
+            conn.execute(
+                update(Job)
+                .where(Job.id.in_(job_ids), Job.status == "running")
+                .values(heartbeat_at=datetime.utcnow())
+            )
+
+    async def _run(self, job: Job) -> None:
+        fn = _handlers.get(job.kind)
+        if fn is None:
+            await run_in_threadpool(_set, job.id, status="failed", error=f"Unknown job kind: {job.kind}",
+                                    finished_at=datetime.utcnow())
+            return
+
+        ctx = JobContext(job.id, json.loads(job.payload), json.loads(job.checkpoint) if job.checkpoint else None)
+        ctx.threaded = not inspect.iscoroutinefunction(fn)
+        if ctx.threaded:
+            task = asyncio.create_task(run_in_threadpool(fn, ctx))
+        else:
+            task = asyncio.create_task(fn(ctx))
+        with self._lock:
+            self._running[job.id] = (task, ctx)
+
+        logger.info("Running job %s (%s), attempt %d", job.id, job.kind, job.attempts)
+        values: dict = {"finished_at": datetime.utcnow()}
+        try:
+            result = await self._wait(task, ctx)
+            values.update(status="succeeded", result=json.dumps(result, default=str))
+        except (JobCancelled, asyncio.CancelledError):
+            if self._stopping:
+                # Shutting down, not cancelled: hand it back so the next start resumes it
+                await run_in_threadpool(_set, job.id, status="queued")
+                raise
+            values.update(status="cancelled")
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job.id, job.kind)
+            values.update(status="failed", error=f"{type(e).__name__}: {e}")
+        finally:
+            with self._lock:
+                self._running.pop(job.id, None)
+
+        values["finished_at"] = datetime.utcnow()
+        await run_in_threadpool(_set, job.id, **values)
+        shutil.rmtree(files_dir(job.id), ignore_errors=True)
+
+    @staticmethod
+    async def _wait(task: asyncio.Task, ctx: JobContext):
+        """Await a handler. Cancelling a threaded one only raises its flag, then waits
+        for the thread to return, so the job is never finished while it still runs."""
+        if not ctx.threaded:
+            return await task
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            ctx.cancelled.set()
+            await asyncio.wait([task])
+            if not task.cancelled():
+                task.exception()  # consumed; the job is handled as cancelled either way
+            raise
+
+
+job_queue = JobQueue()
@@ -0,0 +1,142 @@
+import logging
+import time
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta
+
+import anthropic
+from anthropic.types import Message
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import engine
+from app.models import LlmCall
+
+logger = logging.getLogger(__name__)
+
+MODEL = "claude-sonnet-4-5-20250929"
+
+client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
+async_client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
+
+
+def _request(system: str, user_prompt: str, max_tokens: int, model: str) -> dict:
+    # System prompts are static per call site, so mark them cacheable
+    return {
+        "model": model,
+        "max_tokens": max_tokens,
+        "system": [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}],
+        "messages": [{"role": "user", "content": user_prompt}],
+    }
+
+
+def _record(endpoint: str, model: str, latency_ms: int, message: Message | None, error: Exception | None) -> None:
+    usage = message.usage if message is not None else None
+    values = {
+        "endpoint": endpoint,
+        "model": model,
+        "input_tokens": usage.input_tokens if usage else 0,
+        "output_tokens": usage.output_tokens if usage else 0,
+        "cache_creation_input_tokens": (usage.cache_creation_input_tokens or 0) if usage else 0,
+        "cache_read_input_tokens": (usage.cache_read_input_tokens or 0) if usage else 0,
+        "latency_ms": latency_ms,
+        "stop_reason": message.stop_reason if message is not None else None,
+        "error": f"{type(error).__name__}: {error}" if error else None,
+        "created_at": datetime.utcnow(),
+    }
+    logger.info(
+        "LLM %s: %dms in=%d out=%d cache_read=%d cache_write=%d stop=%s%s",
+        endpoint, values["latency_ms"], values["input_tokens"], values["output_tokens"],
+        values["cache_read_input_tokens"], values["cache_creation_input_tokens"],
+        values["stop_reason"], f" error={values['error']}" if error else "",
+    )
+    # Plain connection insert: accounting must not ride on (or invalidate) a request session
+    try:
+        with engine.begin() as conn:
+            conn.execute(insert(LlmCall).values(**values))
+    except Exception as e:
+        logger.warning("Failed to record LLM call for %s: %s", endpoint, e)
+
+
+def _elapsed_ms(started: float) -> int:
+    return int((time.perf_counter() - started) * 1000)
+
+
+def complete(endpoint: str, system: str, user_prompt: str, max_tokens: int, model: str = MODEL) -> Message:
+    """Blocking Claude call with prompt caching and accounting."""
+    started = time.perf_counter()
+    try:
+        message = client.messages.create(**_request(system, user_prompt, max_tokens, model))
+    except Exception as e:
+        _record(endpoint, model, _elapsed_ms(started), None, e)
+        raise
+    _record(endpoint, model, _elapsed_ms(started), message, None)
+    return message
+
+
+async def acomplete(endpoint: str, system: str, user_prompt: str, max_tokens: int, model: str = MODEL) -> Message:
+    """Async Claude call with prompt caching and accounting."""
+    started = time.perf_counter()
+    try:
+        message = await async_client.messages.create(**_request(system, user_prompt, max_tokens, model))
+    except Exception as e:
+        await run_in_threadpool(_record, endpoint, model, _elapsed_ms(started), None, e)
+        raise
+    await run_in_threadpool(_record, endpoint, model, _elapsed_ms(started), message, None)
+    return message
+
+
+async def astream(
+    endpoint: str, system: str, user_prompt: str, max_tokens: int, model: str = MODEL
+) -> AsyncIterator[str]:
+    """Stream Claude's text; the call is recorded once the final message (and its usage) is known."""
+    started = time.perf_counter()
+    message = None
+    error = None
+    try:
+        async with async_client.messages.stream(**_request(system, user_prompt, max_tokens, model)) as stream:
+            async for text in stream.text_stream:
+                yield text
+            message = await stream.get_final_message()
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        await run_in_threadpool(_record, endpoint, model, _elapsed_ms(started), message, error)
+
+
+def usage_summary(db: Session, since_hours: int = 24) -> list[dict]:
+    """Per-endpoint call counts, latency, tokens and cache usage since the given time."""
+    since = datetime.utcnow() - timedelta(hours=since_hours)
+    rows = (
+        db.query(
+            LlmCall.endpoint,
+            func.count(LlmCall.id),
+            func.count(LlmCall.error),
+            func.avg(LlmCall.latency_ms),
+            func.max(LlmCall.latency_ms),
+            func.sum(LlmCall.input_tokens),
+            func.sum(LlmCall.output_tokens),
+            func.sum(LlmCall.cache_read_input_tokens),
+            func.sum(LlmCall.cache_creation_input_tokens),
+        )
+        .filter(LlmCall.created_at >= since)
+        .group_by(LlmCall.endpoint)
+        .order_by(func.sum(LlmCall.output_tokens).desc())
+        .all()
+    )
+    return [
+        {
+            "endpoint": endpoint,
+            "calls": calls,
+            "errors": errors,
+            "avg_latency_ms": round(avg_latency or 0),
+            "max_latency_ms": max_latency or 0,
+            "input_tokens": input_tokens or 0,
+            "output_tokens": output_tokens or 0,
+            "cache_read_input_tokens": cache_read or 0,
+            "cache_creation_input_tokens": cache_write or 0,
+        }
+        for endpoint, calls, errors, avg_latency, max_latency, input_tokens, output_tokens, cache_read, cache_write in rows
+    ]
@@ -0,0 +1,170 @@
+import logging
+import threading
+from itertools import groupby
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models import Recipe, RecipeIngredient
+from app.services.ingredient_parser import canonical_name, parse_ingredients
+
+logger = logging.getLogger(__name__)
+
+# Ingredients made only of these words are pantry staples the user is assumed to have
+_STAPLE_TOKENS = {
+    "black", "canola", "cooking", "kosher", "oil", "olive", "pepper", "salt", "sea",
+    "spray", "vegetable", "water",
+}
+
+
+def ingredient_tokens(text: str) -> frozenset[str]:
+    """Canonical tokens for a user-entered ingredient name."""
+    return frozenset(canonical_name(text).split())
+
+
+def _line_entry(raw: str, name: str) -> tuple[str, frozenset[str]] | None:
+    tokens = frozenset(name.split())
+    if not tokens or tokens <= _STAPLE_TOKENS:
+        return None
+    return raw, tokens
+
+
+def _recipe_lines(parsed: list[tuple[str, str]]) -> tuple[tuple[str, frozenset[str]], ...]:
+    """Non-staple ingredient lines of a recipe as (display line, tokens), from (raw, name) pairs."""
+    return tuple(entry for entry in (_line_entry(raw, name) for raw, name in parsed) if entry)
+
+
+class IngredientIndex:
+    """In-memory inverted index from canonical ingredient tokens to recipe ids.
+
+    Built lazily from the parsed recipe_ingredients rows on first use, then kept
+    current by the session commit hooks below.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built = False
+        self._postings: dict[str, set[str]] = {}
+        self._lines: dict[str, tuple[tuple[str, frozenset[str]], ...]] = {}
+
+    def _add(self, recipe_id: str, parsed: list[tuple[str, str]]) -> None:
+        self._remove(recipe_id)
+        lines = _recipe_lines(parsed)
+        self._lines[recipe_id] = lines
+        for _, tokens in lines:
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(recipe_id)
+
+    def _remove(self, recipe_id: str) -> None:
+        for _, tokens in self._lines.pop(recipe_id, ()):
+            for token in tokens:
+                postings = self._postings.get(token)
+                if postings is not None:
+                    postings.discard(recipe_id)
+                    if not postings:
+                        del self._postings[token]
+
+    def ensure_built(self, db: Session) -> None:
+        if self._built:
+            return
+        # Hold the lock across the query so a commit landing mid-build isn't lost
+        with self._lock:
+            if self._built:
+                return
+            rows = (
+                db.query(RecipeIngredient.recipe_id, RecipeIngredient.raw, RecipeIngredient.name)
+                .order_by(RecipeIngredient.recipe_id, RecipeIngredient.position)
+                .all()
+            )
+            for recipe_id, group in groupby(rows, key=lambda row: row.recipe_id):
+                self._add(recipe_id, [(row.raw, row.name) for row in group])
+            self._built = True
+        logger.info("Built ingredient index: %d recipes, %d tokens", len(self._lines), len(self._postings))
+
+    def update(self, recipe_id: str, ingredients: str | None) -> None:
+        parsed = [(item["raw"], item["name"]) for item in parse_ingredients(ingredients)]
+        with self._lock:
+            if self._built:
+                self._add(recipe_id, parsed)
+
+    def remove(self, recipe_id: str) -> None:
+        with self._lock:
+            if self._built:
+                self._remove(recipe_id)
+
+    def match(self, ingredients: list[str], limit: int, max_missing: int | None = None) -> list[dict]:
+        """Rank recipes by how few ingredients are missing, then by coverage.
+
+        A recipe line counts as covered when every token of some user ingredient
+        appears in it ("chicken" covers "2 lb boneless chicken thighs").
+        """
+        wanted = [t for t in (ingredient_tokens(i) for i in ingredients) if t]
+        if not wanted:
+            return []
+
+        with self._lock:
+            candidates: set[str] = set()
+            for tokens in wanted:
+                postings = [self._postings.get(t, set()) for t in tokens]
+                candidates |= set.intersection(*postings)
+
+            results = []
+            for recipe_id in candidates:
+                lines = self._lines[recipe_id]
+                missing = [line for line, tokens in lines if not any(w <= tokens for w in wanted)]
+                if max_missing is not None and len(missing) > max_missing:
+                    continue
+                matched = len(lines) - len(missing)
+                results.append({
+                    "recipe_id": recipe_id,
+                    "coverage": matched / len(lines) if lines else 1.0,
+                    "matched_count": matched,
+                    "missing_count": len(missing),
+                    "missing": missing,
+                })
+
+        results.sort(key=lambda r: (r["missing_count"], -r["coverage"], -r["matched_count"]))
+        return results[:limit]
+
+
+ingredient_index = IngredientIndex()
+
+
+def match_recipes(
+    db: Session, ingredients: list[str], limit: int = 10, max_missing: int | None = None
+) -> list[tuple[Recipe, dict]]:
+    """Library recipes best covered by the given ingredients, as (recipe, match info) pairs."""
+    ingredient_index.ensure_built(db)
+    ranked = ingredient_index.match(ingredients, limit, max_missing)
+    if not ranked:
+        return []
+    recipes = {r.id: r for r in db.query(Recipe).filter(Recipe.id.in_([m["recipe_id"] for m in ranked]))}
+    return [(recipes[m["recipe_id"]], m) for m in ranked if m["recipe_id"] in recipes]
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_ingredient_changes(session: Session, flush_context) -> None:
+    changed = session.info.setdefault("ingredient_changes", {})
+    for obj in session.new:
+        if isinstance(obj, Recipe):
+            changed[obj.id] = obj.ingredients or ""
+    for obj in session.dirty:
+        if isinstance(obj, Recipe) and inspect(obj).attrs.ingredients.history.has_changes():
+            changed[obj.id] = obj.ingredients or ""
+    for obj in session.deleted:
+        if isinstance(obj, Recipe):
+            changed[obj.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_ingredient_changes(session: Session) -> None:
+    for recipe_id, ingredients in session.info.pop("ingredient_changes", {}).items():
+        if ingredients is None:
+            ingredient_index.remove(recipe_id)
+        else:
+            ingredient_index.update(recipe_id, ingredients)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_ingredient_changes(session: Session) -> None:
+    session.info.pop("ingredient_changes", None)
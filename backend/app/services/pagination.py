@@ -0,0 +1,152 @@
+import base64
+import binascii
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable
+
+from sqlalchemy import and_, event, or_
+from sqlalchemy.orm import InstrumentedAttribute, ORMExecuteState, Query, Session
+
+from app.models import Recipe, RecipeTabRecipe, SavedRecipe
+
+COUNT_CACHE_TTL = 300  # seconds
+
+# Models whose inserts/deletes change the listing totals
+_COUNTED_MODELS = (Recipe, SavedRecipe, RecipeTabRecipe)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, ValueError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    if not isinstance(payload, dict):
+        raise InvalidCursor("Invalid cursor")
+    return payload
+
+
+def keyset_page(
+    query: Query,
+    sort_col: InstrumentedAttribute,
+    id_col: InstrumentedAttribute,
+    key: Callable[[Any], tuple[datetime, Any]],
+    cursor: str | None,
+    limit: int,
+    offset: int = 0,
+) -> tuple[list, str | None]:
+    """Fetch one page ordered by (sort_col DESC, id_col DESC).
+
+    Seeks past the cursor position when one is given, otherwise applies ``offset``
+    (legacy page numbers). ``key`` maps a result row to its (sort, id) values.
+    Returns (rows, next_cursor).
+    """
+    query = query.order_by(None).order_by(sort_col.desc(), id_col.desc())
+    if cursor is not None:
+        payload = decode_cursor(cursor)
+        try:
+            sort_val, id_val = payload["k"]
+            sort_val = datetime.fromisoformat(sort_val)
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidCursor("Invalid cursor") from e
+        query = query.filter(
+            or_(sort_col < sort_val, and_(sort_col == sort_val, id_col < id_val))
+        )
+    elif offset:
+        query = query.offset(offset)
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if 0 < limit < len(rows):
+        rows = rows[:limit]
+        sort_val, id_val = key(rows[-1])
+        next_cursor = encode_cursor({"k": [sort_val.isoformat(), id_val]})
+    return rows, next_cursor
+
+
+def offset_page(query: Query, cursor: str | None, limit: int, offset: int = 0) -> tuple[list, str | None]:
+    """Fetch one page of an already-ordered query that has no stable sort key (e.g. ranked search).
+
+    The cursor is still opaque to clients; it just carries the next offset.
+    """
+    if cursor is not None:
+        payload = decode_cursor(cursor)
+        offset = payload.get("o")
+        if not isinstance(offset, int) or offset < 0:
+            raise InvalidCursor("Invalid cursor")
+
+    rows = query.offset(offset).limit(limit + 1).all()
+    next_cursor = None
+    if 0 < limit < len(rows):
+        rows = rows[:limit]
+        next_cursor = encode_cursor({"o": offset + limit})
+    return rows, next_cursor
+
+
+class _CountCache:
+    """Totals for listing queries, reused until a relevant write happens or the TTL passes."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._entries: dict[tuple, tuple[int, int, float]] = {}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def get_or_count(self, key: tuple, query: Query) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            generation = self._generation
+            if entry and entry[1] == generation and now - entry[2] < self.ttl:
+                return entry[0]
+
+        total = query.order_by(None).count()
+        with self._lock:
+            # Don't cache a count that raced with a write
+            if self._generation == generation:
+                self._entries[key] = (total, generation, now)
+        return total
+
+
+count_cache = _CountCache(COUNT_CACHE_TTL)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_counts_dirty(session: Session, flush_context) -> None:
+    if any(isinstance(obj, _COUNTED_MODELS) for obj in (*session.new, *session.deleted)):
+        session.info["counts_dirty"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_counts_dirty_on_dml(orm_execute_state: ORMExecuteState) -> None:
+    # Bulk insert/delete statements bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_delete:
+        orm_execute_state.session.info["counts_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_counts_on_commit(session: Session) -> None:
+    # Invalidate only once the write is visible to other connections
+    if session.info.pop("counts_dirty", False):
+        count_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_counts_dirty(session: Session) -> None:
+    session.info.pop("counts_dirty", None)
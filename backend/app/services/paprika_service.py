@@ -3,14 +3,16 @@ import gzip
 import hashlib
 import io
 import json
-import uuid
 import zipfile
+from collections.abc import Callable
 from datetime import datetime
 from pathlib import Path
 
 from sqlalchemy.orm import Session
 
 from app.models import Recipe, SavedRecipe
+from app.services.image_store import store_bytes
+from app.services.image_variants import variants_json
 
 UPLOADS_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "uploads"
 
@@ -21,15 +23,31 @@ def _recipe_hash(data: dict) -> str:
     return hashlib.sha256(content.encode("utf-8")).hexdigest()
 
 
-def import_paprika(db: Session, file_bytes: bytes) -> dict:
-    """Import recipes from a .paprikarecipes file (ZIP of gzipped JSON files)."""
+def import_paprika(
+    db: Session,
+    file_bytes: bytes,
+    checkpoint: dict | None = None,
+    on_progress: Callable[[int, int, dict], None] | None = None,
+) -> dict:
+    """Import recipes from a .paprikarecipes file (ZIP of gzipped JSON files).
+
+    Without on_progress the whole file is one transaction. With it, the recipes so
+    far are committed before each on_progress(done, total, state) call, so progress
+    can be written on another connection without waiting on this one's write lock,
+    and state is a checkpoint to resume from. on_progress may raise to stop; the
+    recipes committed until then are kept.
+    """
     imported = []
-    skipped = 0
+    state = dict(checkpoint or {"next": 0, "imported": 0, "skipped": 0})
 
     with zipfile.ZipFile(io.BytesIO(file_bytes), "r") as zf:
-        for entry in zf.namelist():
-            if not entry.endswith(".paprikarecipe"):
-                continue
+        entries = [e for e in zf.namelist() if e.endswith(".paprikarecipe")]
+        for done in range(state["next"], len(entries)):
+            entry = entries[done]
+            state["next"] = done
+            if on_progress:
+                db.commit()
+                on_progress(done, len(entries), state)
 
             raw = zf.read(entry)
             try:
@@ -43,7 +61,7 @@ def import_paprika(db: Session, file_bytes: bytes) -> dict:
             # Use Paprika's UID if available, otherwise generate
             recipe_id = data.get("uid")
             if recipe_id and db.query(Recipe).filter(Recipe.id == recipe_id).first():
-                skipped += 1
+                state["skipped"] += 1
                 continue
 
             # Build source from source + source_url
@@ -87,10 +105,9 @@ def import_paprika(db: Session, file_bytes: bytes) -> dict:
                 try:
                     img_bytes = base64.b64decode(photo_data)
                     if len(img_bytes) > 0:
-                        UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
-                        filename = f"{recipe.id}_{uuid.uuid4().hex[:8]}.jpg"
-                        (UPLOADS_DIR / filename).write_bytes(img_bytes)
-                        recipe.image_url = f"/api/uploads/{filename}"
+                        # The flush above holds the write lock; register the blob on the same connection
+                        recipe.image_url = store_bytes(img_bytes, conn=db.connection())
+                        recipe.image_variants = variants_json(recipe.image_url)
                 except Exception:
                     pass  # Skip bad image data silently
 
@@ -105,9 +122,11 @@ def import_paprika(db: Session, file_bytes: bytes) -> dict:
                 db.add(saved)
 
             imported.append(recipe)
+            state["imported"] += 1
 
+        state["next"] = len(entries)
     db.commit()
-    return {"imported": len(imported), "skipped": skipped, "recipes": imported}
+    return {"imported": state["imported"], "skipped": state["skipped"], "recipes": imported}
 
 
 def export_paprika(db: Session, recipes: list[Recipe]) -> bytes:
@@ -0,0 +1,121 @@
+"""Persistent cache of Pexels searches, keyed by a normalized form of the recipe name.
+
+"Easy Garlic-Butter Chicken" and "garlic butter chickens" normalize to the same key,
+so they share one search. Searches that found nothing are cached too, so a name
+Pexels has no photo for isn't searched again on every save.
+"""
+
+import re
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select, update
+
+from app.config import settings
+from app.database import engine
+from app.models import PexelsSearch
+
+# Words that change a recipe's name but not what a photo of it looks like
+_FILLER_WORDS = {
+    "a", "an", "and", "the", "with", "in", "on", "of", "for", "style", "recipe",
+    "easy", "quick", "simple", "best", "classic", "homemade", "healthy", "perfect",
+    "ultimate", "favorite", "favourite", "delicious", "my", "our", "mom", "grandma",
+}
+
+
+class _Counters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+counters = _Counters()
+
+
+def _singular(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def search_terms(recipe_name: str) -> list[str]:
+    """Significant words of a recipe name, in order, without repeats."""
+    words = [w.strip("'").removesuffix("'s") for w in re.findall(r"[a-z0-9']+", recipe_name.lower())]
+    terms = []
+    for word in words:
+        if word and word not in _FILLER_WORDS and word not in terms:
+            terms.append(word)
+    return terms or [w for w in words if w] or [recipe_name.lower().strip()]
+
+
+def normalize_query(recipe_name: str) -> str:
+    """Cache key for a recipe name: its search terms, singular and order-independent."""
+    return " ".join(sorted({_singular(term) for term in search_terms(recipe_name)}))
+
+
+# Called from background image threads, so everything goes through its own Core connection
+
+def lookup(query: str) -> tuple[bool, str | None]:
+    """(found, photo_url) for a normalized query; photo_url is None for a cached miss."""
+    cutoff = datetime.utcnow() - timedelta(hours=settings.pexels_cache_ttl_hours)
+    with engine.begin() as conn:
+        row = conn.execute(
+            select(PexelsSearch.photo_url).where(PexelsSearch.query == query, PexelsSearch.created_at >= cutoff)
+        ).first()
+        if row is not None:
+            conn.execute(
+                update(PexelsSearch)
+                .where(PexelsSearch.query == query)
+                .values(hits=PexelsSearch.hits + 1, last_used_at=datetime.utcnow())
+            )
+    counters.record(hit=row is not None)
+    return (True, row.photo_url) if row is not None else (False, None)
+
+
+def store(query: str, photo_url: str | None) -> None:
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(delete(PexelsSearch).where(PexelsSearch.query == query))
+        conn.execute(insert(PexelsSearch).values(
+            query=query, photo_url=photo_url, hits=0, created_at=now, last_used_at=now
+        ))
+        _evict(conn)
+
+
+def _evict(conn) -> None:
+    """Drop expired entries and the least recently used ones beyond the size bound."""
+    cutoff = datetime.utcnow() - timedelta(hours=settings.pexels_cache_ttl_hours)
+    conn.execute(delete(PexelsSearch).where(PexelsSearch.created_at < cutoff))
+    overflow = (
+        select(PexelsSearch.query)
+        .order_by(PexelsSearch.last_used_at.desc())
+        .offset(settings.pexels_cache_max_entries)
+    )
+    conn.execute(delete(PexelsSearch).where(PexelsSearch.query.in_(overflow)))
+
+
+def cache_stats() -> dict:
+    total = counters.hits + counters.misses
+    with engine.connect() as conn:
+        entries, empty = conn.execute(
+            select(func.count(), func.count().filter(PexelsSearch.photo_url.is_(None)))
+        ).one()
+    return {
+        "hits": counters.hits,
+        "misses": counters.misses,
+        "hit_rate": round(counters.hits / total, 3) if total else 0.0,
+        "entries": entries,
+        "entries_without_photo": empty,
+        "ttl_hours": settings.pexels_cache_ttl_hours,
+        "max_entries": settings.pexels_cache_max_entries,
+    }
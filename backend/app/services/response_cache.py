@@ -0,0 +1,152 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# GET endpoints whose responses depend only on the database and the query string
+CACHEABLE_PATHS = [
+    re.compile(p) for p in (
+        r"^/api/tabs$",
+        r"^/api/tabs/recipe/[^/]+$",
+        r"^/api/recipes$",
+        r"^/api/recipes/all$",
+        # A recipe by id, but not /recipes/images: image polling must always see fresh state
+        r"^/api/recipes/(?!images$)[^/]+$",
+        r"^/api/stats/top-ingredients$",
+        r"^/api/stats/preferences$",
+    )
+]
+MAX_ENTRIES = 512
+
+
+class _DataVersion:
+    """Counter bumped after every committed write; cached responses from older versions are stale."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def bump(self) -> None:
+        with self._lock:
+            self.value += 1
+
+
+data_version = _DataVersion()
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_written_on_flush(session: Session, flush_context) -> None:
+    session.info["response_cache_dirty"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_written_on_dml(orm_execute_state: ORMExecuteState) -> None:
+    # Bulk insert/update/delete statements bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["response_cache_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session: Session) -> None:
+    if session.info.pop("response_cache_dirty", False):
+        data_version.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop("response_cache_dirty", None)
+
+
+class ResponseCacheMiddleware:
+    """In-process cache for read endpoints, with strong ETags and If-None-Match → 304.
+
+    Entries are keyed by path and normalized query string and are valid only for the
+    data version they were rendered at, so any committed write invalidates them.
+    """
+
+    def __init__(self, app: ASGIApp, max_entries: int = MAX_ENTRIES):
+        self.app = app
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, str], tuple[int, str, bytes, str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not any(p.match(scope["path"]) for p in CACHEABLE_PATHS)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        query = "&".join(sorted(scope.get("query_string", b"").decode("latin-1").split("&")))
+        key = (scope["path"], query)
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        version = data_version.value
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                entry = None
+                self.misses += 1
+
+        if entry is not None:
+            _, etag, body, content_type = entry
+            await self._respond(send, etag, body, content_type, if_none_match)
+            return
+
+        start: Message = {}
+        chunks: list[bytes] = []
+
+        async def capture(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+
+        body = b"".join(chunks)
+        if start.get("status") != 200:
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        content_type = Headers(raw=start.get("headers", [])).get("content-type", "application/json")
+        # Only keep it if no write landed while it was being rendered
+        if data_version.value == version:
+            with self._lock:
+                self._entries[key] = (version, etag, body, content_type)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        await self._respond(send, etag, body, content_type, if_none_match)
+
+    @staticmethod
+    async def _respond(send: Send, etag: str, body: bytes, content_type: str, if_none_match: str | None) -> None:
+        headers = [
+            (b"etag", etag.encode("latin-1")),
+            (b"cache-control", b"no-cache"),
+        ]
+        if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        headers += [
+            (b"content-type", content_type.encode("latin-1")),
+            (b"content-length", str(len(body)).encode("latin-1")),
+        ]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,166 @@
+import logging
+import re
+
+from sqlalchemy import Engine, column, false, func, literal_column, table, text
+from sqlalchemy.orm import Query, Session
+
+from app.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "recipes_fts"
+FTS_COLUMNS = ("name", "ingredients", "directions", "description", "notes", "cuisine")
+
+# BM25 column weights, in FTS_COLUMNS order — a hit in the name matters most
+BM25_WEIGHTS = (10.0, 4.0, 1.0, 2.0, 1.0, 3.0)
+
+# Standalone FTS table rather than external content: recipes has a string primary
+# key, and its implicit rowid is not stable across VACUUM.
+_CREATE_FTS = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    recipe_id UNINDEXED,
+    {", ".join(FTS_COLUMNS)},
+    tokenize = 'porter unicode61 remove_diacritics 2'
+)
+"""
+
+_NEW_VALUES = ", ".join(f"coalesce(new.{c}, '')" for c in FTS_COLUMNS)
+_ROW_VALUES = ", ".join(f"coalesce({c}, '')" for c in FTS_COLUMNS)
+
+_CREATE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS recipes_fts_insert AFTER INSERT ON recipes BEGIN
+        INSERT INTO {FTS_TABLE} (recipe_id, {", ".join(FTS_COLUMNS)})
+        VALUES (new.id, {_NEW_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS recipes_fts_update
+    AFTER UPDATE OF id, {", ".join(FTS_COLUMNS)} ON recipes BEGIN
+        DELETE FROM {FTS_TABLE} WHERE recipe_id = old.id;
+        INSERT INTO {FTS_TABLE} (recipe_id, {", ".join(FTS_COLUMNS)})
+        VALUES (new.id, {_NEW_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS recipes_fts_delete AFTER DELETE ON recipes BEGIN
+        DELETE FROM {FTS_TABLE} WHERE recipe_id = old.id;
+    END
+    """,
+]
+
+_fts_table = table(FTS_TABLE, column("recipe_id"))
+_fts_available = False
+
+
+def ensure_search_index(engine: Engine) -> bool:
+    """Create the FTS table and sync triggers if missing, populating it on first creation.
+
+    Returns False (and leaves search on the LIKE fallback) when the database is not
+    SQLite or was built without FTS5.
+    """
+    global _fts_available
+
+    if engine.dialect.name != "sqlite":
+        _fts_available = False
+        return False
+
+    with engine.begin() as conn:
+        existed = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE},
+        ).first() is not None
+        try:
+            conn.execute(text(_CREATE_FTS))
+        except Exception as e:
+            logger.warning("FTS5 unavailable, falling back to LIKE search: %s", e)
+            _fts_available = False
+            return False
+        for ddl in _CREATE_TRIGGERS:
+            conn.execute(text(ddl))
+        if not existed:
+            count = _rebuild(conn)
+            logger.info("Built %s with %d recipes", FTS_TABLE, count)
+
+    _fts_available = True
+    return True
+
+
+def _rebuild(conn) -> int:
+    conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    conn.execute(
+        text(
+            f"INSERT INTO {FTS_TABLE} (recipe_id, {', '.join(FTS_COLUMNS)}) "
+            f"SELECT id, {_ROW_VALUES} FROM recipes"
+        )
+    )
+    conn.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"))
+    return conn.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar() or 0
+
+
+def rebuild_search_index(engine: Engine) -> int:
+    """Repopulate the FTS table from scratch. Returns the number of indexed recipes."""
+    ensure_search_index(engine)
+    if not _fts_available:
+        raise RuntimeError("FTS5 search index is not available for this database")
+    with engine.begin() as conn:
+        return _rebuild(conn)
+
+
+def build_match_expression(search: str) -> str | None:
+    """Turn free user input into a safe FTS5 query: every word must match, the last as a prefix."""
+    tokens = re.findall(r"\w+", search.lower())
+    if not tokens:
+        return None
+    terms = [f'"{t}"' for t in tokens[:-1]] + [f'"{tokens[-1]}"*']
+    return " ".join(terms)
+
+
+def apply_search(query: Query, search: str) -> tuple[Query, str | None]:
+    """Restrict a Recipe query to full-text matches, ordered by BM25 rank.
+
+    Returns the ranked query and the FTS match expression (for ``snippets_for``).
+    Falls back to a name LIKE filter, with no match expression, when FTS is unavailable.
+    """
+    if not _fts_available:
+        return query.filter(Recipe.name.ilike(f"%{search}%")), None
+
+    match = build_match_expression(search)
+    if match is None:
+        return query.filter(false()), None
+
+    rank = func.bm25(literal_column(FTS_TABLE), *BM25_WEIGHTS)
+    query = (
+        query.join(_fts_table, _fts_table.c.recipe_id == Recipe.id)
+        .filter(literal_column(FTS_TABLE).op("MATCH")(match))
+        .order_by(None)
+        .order_by(rank, Recipe.created_at.desc())
+    )
+    return query, match
+
+
+def snippets_for(db: Session, recipe_ids: list[str], match: str) -> dict[str, str]:
+    """Highlighted snippets for the given recipes against an FTS match expression."""
+    if not recipe_ids:
+        return {}
+    snippet = func.snippet(literal_column(FTS_TABLE), -1, "<mark>", "</mark>", "…", 16)
+    rows = db.execute(
+        _fts_table.select()
+        .with_only_columns(_fts_table.c.recipe_id, snippet.label("snippet"))
+        .where(literal_column(FTS_TABLE).op("MATCH")(match))
+        .where(_fts_table.c.recipe_id.in_(recipe_ids))
+    ).all()
+    return {row.recipe_id: row.snippet for row in rows}
+
+
+if __name__ == "__main__":
+    import sys
+
+    from app.database import Base, engine
+
+    if sys.argv[1:] != ["rebuild"]:
+        print("usage: python -m app.services.search_service rebuild")
+        sys.exit(2)
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(bind=engine)
+    print(f"Indexed {rebuild_search_index(engine)} recipes")
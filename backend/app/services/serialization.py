@@ -0,0 +1,82 @@
+import json
+
+from sqlalchemy.orm import Session
+
+from app.models import Job, Recipe, SavedRecipe
+from app.schemas import JobOut, RecipeOut
+from app.services.image_variants import parse_variants
+
+
+def _load_saved_state(db: Session, recipe_ids: list[str]) -> dict[str, int | None]:
+    """Return {recipe_id: rating} for every saved recipe in the given ids, in one query."""
+    if not recipe_ids:
+        return {}
+    rows = (
+        db.query(SavedRecipe.recipe_id, SavedRecipe.rating)
+        .filter(SavedRecipe.recipe_id.in_(recipe_ids))
+        .all()
+    )
+    return {row.recipe_id: row.rating for row in rows}
+
+
+def _build_recipe_out(
+    recipe: Recipe, is_saved: bool, rating: int | None, snippet: str | None = None
+) -> RecipeOut:
+    return RecipeOut(
+        id=recipe.id,
+        name=recipe.name,
+        ingredients=recipe.ingredients,
+        directions=recipe.directions,
+        description=recipe.description,
+        notes=recipe.notes,
+        source=recipe.source,
+        prep_time=recipe.prep_time,
+        cook_time=recipe.cook_time,
+        total_time=recipe.total_time,
+        servings=recipe.servings,
+        categories=recipe.categories,
+        nutritional_info=recipe.nutritional_info,
+        image_url=recipe.image_url,
+        difficulty=recipe.difficulty,
+        cuisine=recipe.cuisine,
+        ai_generated=recipe.ai_generated,
+        created_at=recipe.created_at,
+        is_saved=is_saved,
+        rating=rating,
+        snippet=snippet,
+        image_status=recipe.image_status,
+        image_variants=parse_variants(recipe.image_variants),
+    )
+
+
+def recipes_to_out(
+    db: Session, recipes: list[Recipe], snippets: dict[str, str] | None = None
+) -> list[RecipeOut]:
+    """Serialize a page of recipes, loading saved/rating state with a single query."""
+    saved = _load_saved_state(db, [r.id for r in recipes])
+    snippets = snippets or {}
+    return [
+        _build_recipe_out(r, r.id in saved, saved.get(r.id), snippets.get(r.id))
+        for r in recipes
+    ]
+
+
+def recipe_to_out(db: Session, recipe: Recipe) -> RecipeOut:
+    return recipes_to_out(db, [recipe])[0]
+
+
+def job_to_out(job: Job) -> JobOut:
+    return JobOut(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        progress_done=job.progress_done or 0,
+        progress_total=job.progress_total,
+        result=json.loads(job.result) if job.result else None,
+        error=job.error,
+        cancel_requested=bool(job.cancel_requested),
+        attempts=job.attempts or 0,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
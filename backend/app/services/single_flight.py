@@ -0,0 +1,79 @@
+import logging
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from app.database import engine
+from app.models import Lease
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = 0.5
+
+# Threads in this process queue on a local lock instead of polling the lease table
+_local_locks: dict[str, threading.Lock] = {}
+_local_locks_guard = threading.Lock()
+
+
+def _local_lock(name: str) -> threading.Lock:
+    with _local_locks_guard:
+        return _local_locks.setdefault(name, threading.Lock())
+
+
+def try_acquire(name: str, ttl_seconds: float) -> str | None:
+    """Take the named lease if it is free or expired. Returns the owner token, or None."""
+    owner = uuid.uuid4().hex
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    # Core statements on their own connection: lease churn must not look like a data write
+    with engine.begin() as conn:
+        taken = conn.execute(
+            update(Lease)
+            .where(Lease.name == name, Lease.expires_at < now)
+            .values(owner=owner, expires_at=expires_at)
+        ).rowcount
+        if taken:
+            logger.warning("Took over expired lease %s", name)
+            return owner
+    try:
+        with engine.begin() as conn:
+            conn.execute(insert(Lease).values(name=name, owner=owner, expires_at=expires_at))
+    except IntegrityError:
+        return None
+    return owner
+
+
+def release(name: str, owner: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(delete(Lease).where(Lease.name == name, Lease.owner == owner))
+
+
+@contextmanager
+def single_flight(name: str, ttl_seconds: float, wait_seconds: float) -> Iterator[None]:
+    """Run the block in at most one thread across all workers at a time.
+
+    Callers that find the lease taken wait for it, then run the block themselves; the
+    block is expected to re-check for the result the previous holder produced.
+    ttl_seconds bounds how long a crashed holder can block everyone else.
+    """
+    deadline = time.monotonic() + wait_seconds
+    lock = _local_lock(name)
+    if not lock.acquire(timeout=wait_seconds):
+        raise TimeoutError(f"Timed out waiting for {name}")
+    try:
+        while (owner := try_acquire(name, ttl_seconds)) is None:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out waiting for {name}")
+            time.sleep(POLL_INTERVAL_SECONDS)
+        try:
+            yield
+        finally:
+            release(name, owner)
+    finally:
+        lock.release()
@@ -0,0 +1,223 @@
+"""Extract schema.org Recipe data (JSON-LD and microdata) straight into our recipe fields.
+
+Most recipe sites publish this for search engines, which makes it a reliable source
+that doesn't need a Claude call to interpret.
+"""
+
+import html
+import json
+import re
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, Tag
+
+_DURATION_RE = re.compile(
+    r"^P(?:(?P<days>\d+(?:\.\d+)?)D)?"
+    r"(?:T(?:(?P<hours>\d+(?:\.\d+)?)H)?(?:(?P<minutes>\d+(?:\.\d+)?)M)?(?:(?P<seconds>\d+(?:\.\d+)?)S)?)?$",
+    re.IGNORECASE,
+)
+
+# schema.org NutritionInformation properties, in display order
+_NUTRITION_FIELDS = [
+    ("calories", "Calories"),
+    ("fatContent", "Fat"),
+    ("saturatedFatContent", "Saturated fat"),
+    ("carbohydrateContent", "Carbs"),
+    ("sugarContent", "Sugar"),
+    ("fiberContent", "Fiber"),
+    ("proteinContent", "Protein"),
+    ("cholesterolContent", "Cholesterol"),
+    ("sodiumContent", "Sodium"),
+]
+
+
+def _clean(value: object) -> str:
+    """Plain text from a schema.org string, which is often HTML-escaped or contains tags."""
+    if value is None:
+        return ""
+    text = html.unescape(str(value))
+    text = re.sub(r"<[^>]+>", " ", text)
+    return re.sub(r"\s+([.,;:!?])", r"\1", " ".join(text.split()))
+
+
+def _as_list(value: object) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _first_text(value: object) -> str | None:
+    for item in _as_list(value):
+        if isinstance(item, dict):
+            item = item.get("name") or item.get("text")
+        text = _clean(item)
+        if text:
+            return text
+    return None
+
+
+def format_duration(value: object) -> str | None:
+    """ISO-8601 duration ("PT1H30M") to our display format ("1 hr 30 min")."""
+    text = _first_text(value)
+    if not text:
+        return None
+    m = _DURATION_RE.match(text.strip())
+    if not m or not any(m.groupdict().values()):
+        # Some sites put free text here already
+        return text
+    minutes = round(
+        float(m["days"] or 0) * 1440 + float(m["hours"] or 0) * 60
+        + float(m["minutes"] or 0) + float(m["seconds"] or 0) / 60
+    )
+    if minutes <= 0:
+        return None
+    hours, minutes = divmod(minutes, 60)
+    if not hours:
+        return f"{minutes} min"
+    return f"{hours} hr" + (f" {minutes} min" if minutes else "")
+
+
+def _format_yield(value: object) -> str | None:
+    # recipeYield is often ["4", "4 servings"]; prefer the descriptive form
+    texts = [_clean(v) for v in _as_list(value) if _clean(v)]
+    if not texts:
+        return None
+    text = max(texts, key=len)
+    return f"{text} servings" if text.isdigit() else text
+
+
+def _instruction_steps(value: object) -> list[str]:
+    """Flatten recipeInstructions: a string, strings, HowToSteps or HowToSections of them."""
+    steps = []
+    for item in _as_list(value):
+        if isinstance(item, dict):
+            types = _as_list(item.get("@type"))
+            if "HowToSection" in types or "itemListElement" in item:
+                steps += _instruction_steps(item.get("itemListElement"))
+            else:
+                text = _clean(item.get("text") or item.get("name"))
+                if text:
+                    steps.append(text)
+        elif isinstance(item, str):
+            # A block of text: one step per line or paragraph
+            lines = [_clean(line) for line in re.split(r"\n+|<br\s*/?>|</p>", html.unescape(item))]
+            steps += [line for line in lines if line]
+    return steps
+
+
+def _format_directions(steps: list[str]) -> str:
+    steps = [re.sub(r"^(?:step\s*)?\d+[.:)]\s*", "", s, flags=re.IGNORECASE) for s in steps]
+    return "\n".join(f"Step {i}: {step}" for i, step in enumerate(steps, 1) if step)
+
+
+def _format_nutrition(value: object) -> str | None:
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if not isinstance(value, dict):
+        return _clean(value) or None
+    parts = [f"{label}: {_clean(value[key])}" for key, label in _NUTRITION_FIELDS if value.get(key)]
+    return ", ".join(parts) or None
+
+
+def _image_url(value: object, base_url: str) -> str | None:
+    for item in _as_list(value):
+        if isinstance(item, dict):
+            item = item.get("url") or item.get("contentUrl")
+        if isinstance(item, str) and item.strip():
+            return urljoin(base_url, item.strip())
+    return None
+
+
+def _to_recipe(data: dict, base_url: str) -> dict | None:
+    name = _clean(data.get("name"))
+    ingredients = [_clean(i) for i in _as_list(data.get("recipeIngredient") or data.get("ingredients"))]
+    ingredients = [i for i in ingredients if i]
+    if not name or not ingredients:
+        return None
+
+    categories = [_clean(c) for c in _as_list(data.get("recipeCategory")) if _clean(c)]
+    return {
+        "name": name,
+        "ingredients": "\n".join(ingredients),
+        "directions": _format_directions(_instruction_steps(data.get("recipeInstructions"))),
+        "description": _clean(data.get("description")) or None,
+        "prep_time": format_duration(data.get("prepTime")),
+        "cook_time": format_duration(data.get("cookTime")),
+        "total_time": format_duration(data.get("totalTime")),
+        "servings": _format_yield(data.get("recipeYield")),
+        "categories": json.dumps(categories) if categories else None,
+        "cuisine": _first_text(data.get("recipeCuisine")),
+        "nutritional_info": _format_nutrition(data.get("nutrition")),
+        "difficulty": None,
+        "image": _image_url(data.get("image"), base_url),
+    }
+
+
+def _json_ld_recipes(node: object) -> list[dict]:
+    """Recipe objects anywhere in a JSON-LD document (top level, lists, @graph, mainEntity)."""
+    found = []
+    if isinstance(node, list):
+        for item in node:
+            found += _json_ld_recipes(item)
+    elif isinstance(node, dict):
+        if "Recipe" in _as_list(node.get("@type")):
+            found.append(node)
+        else:
+            for key in ("@graph", "mainEntity", "mainEntityOfPage", "itemListElement", "item"):
+                if key in node:
+                    found += _json_ld_recipes(node[key])
+    return found
+
+
+def _microdata_value(tag: Tag) -> str:
+    for attr in ("content", "datetime", "src", "href"):
+        if tag.get(attr):
+            return tag[attr]
+    # Newlines keep <br>/<p>-separated instruction steps apart; _clean folds them elsewhere
+    return tag.get_text("\n", strip=True)
+
+
+def _microdata_item(scope: Tag) -> dict:
+    """Properties of one itemscope, without descending into nested scopes' properties."""
+    data: dict[str, list] = {}
+    for tag in scope.find_all(attrs={"itemprop": True}):
+        # Skip properties that belong to a nested item
+        owner = tag.find_parent(attrs={"itemscope": True})
+        if owner is not scope:
+            continue
+        for prop in tag["itemprop"].split():
+            if tag.has_attr("itemscope"):
+                value = _microdata_item(tag)
+                value["@type"] = [t.rsplit("/", 1)[-1] for t in (tag.get("itemtype") or "").split()]
+            else:
+                value = _microdata_value(tag)
+            data.setdefault(prop, []).append(value)
+    # Collapse single values so the result reads like JSON-LD
+    return {k: v[0] if len(v) == 1 and k not in ("recipeIngredient", "ingredients") else v for k, v in data.items()}
+
+
+def extract_structured_recipes(soup: BeautifulSoup, base_url: str) -> list[dict]:
+    """Recipes published as JSON-LD or microdata, mapped to our fields plus an "image" URL.
+
+    Call before script tags are stripped. Returns [] when the page has no usable
+    Recipe data, so the caller can fall back to Claude.
+    """
+    raw = []
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            raw += _json_ld_recipes(json.loads(script.string or ""))
+        except json.JSONDecodeError:
+            continue
+
+    if not raw:
+        for scope in soup.find_all(attrs={"itemscope": True, "itemtype": re.compile(r"schema\.org/Recipe$")}):
+            raw.append(_microdata_item(scope))
+
+    recipes = []
+    seen = set()
+    for data in raw:
+        recipe = _to_recipe(data, base_url)
+        if recipe and recipe["name"].lower() not in seen:
+            seen.add(recipe["name"].lower())
+            recipes.append(recipe)
+    return recipes
@@ -1,45 +1,57 @@
+import asyncio
 import json
-from datetime import date, datetime
+import logging
+from datetime import date, datetime, timedelta
 
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.config import settings
+from app.database import SessionLocal
 from app.models import DailySuggestion, Recipe
 from app.services.claude_service import generate_daily_suggestions, normalize_recipe
-from app.services.import_service import search_recipe_image
+from app.services.image_service import mark_pending, schedule_image_fetches
 from app.services.learning_service import get_user_preferences
+from app.services.single_flight import single_flight
 
+logger = logging.getLogger(__name__)
 
-def get_or_create_daily_suggestions(db: Session, force_refresh: bool = False) -> dict:
-    today = date.today()
+# A generation is one Claude call plus five image lookups; waiters give up after this
+GENERATION_LEASE_SECONDS = 300
 
-    if not force_refresh:
-        existing = (
-            db.query(DailySuggestion)
-            .filter(DailySuggestion.date == today)
-            .first()
-        )
-        if existing:
-            try:
-                recipe_ids = json.loads(existing.recipes)
-            except (json.JSONDecodeError, TypeError):
-                recipe_ids = []
-
-            if recipe_ids:
-                recipes = db.query(Recipe).filter(Recipe.id.in_(recipe_ids)).all()
-                if recipes:
-                    return {
-                        "theme": existing.theme,
-                        "recipes": recipes,
-                        "date": str(today),
-                    }
-
-            # Cached entry is broken — delete it and regenerate
-            print(f"[SUGGESTIONS] Stale cache entry for {today}, regenerating", flush=True)
-            db.delete(existing)
-            db.commit()
 
+def _load_existing(db: Session, day: date, created_after: datetime | None = None) -> dict | None:
+    existing = db.query(DailySuggestion).filter(DailySuggestion.date == day).first()
+    if not existing:
+        return None
+    if created_after and existing.created_at < created_after:
+        return None
+
+    try:
+        recipe_ids = json.loads(existing.recipes)
+    except (json.JSONDecodeError, TypeError):
+        recipe_ids = []
+
+    if recipe_ids:
+        recipes = db.query(Recipe).filter(Recipe.id.in_(recipe_ids)).all()
+        if recipes:
+            return {
+                "theme": existing.theme,
+                "recipes": recipes,
+                "date": str(day),
+            }
+
+    # Cached entry is broken — delete it and regenerate
+    logger.info("Stale daily suggestions for %s, regenerating", day)
+    db.delete(existing)
+    db.commit()
+    return None
+
+
+def _generate(db: Session, day: date) -> dict:
     preferences = get_user_preferences(db)
-    result = generate_daily_suggestions(preferences)
+    result = generate_daily_suggestions(preferences, day)
 
     recipes = []
     recipe_ids = []
@@ -61,30 +73,85 @@ def get_or_create_daily_suggestions(db: Session, force_refresh: bool = False) ->
             source="AI Generated - Daily Suggestion",
             ai_generated=True,
         )
+        mark_pending(recipe)
         db.add(recipe)
         db.flush()
 
-        image_path, _ = search_recipe_image(recipe.name, recipe.id)
-        if image_path:
-            recipe.image_url = image_path
-
         recipes.append(recipe)
         recipe_ids.append(recipe.id)
 
-    # Remove any old entry for today before inserting
-    db.query(DailySuggestion).filter(DailySuggestion.date == today).delete()
+    # Remove any old entry for the day before inserting
+    db.query(DailySuggestion).filter(DailySuggestion.date == day).delete()
 
     suggestion = DailySuggestion(
-        date=today,
+        date=day,
         recipes=json.dumps(recipe_ids),
         theme=result.get("theme", "Daily Picks"),
         created_at=datetime.utcnow(),
     )
     db.add(suggestion)
     db.commit()
+    schedule_image_fetches(recipes)
 
     return {
         "theme": suggestion.theme,
         "recipes": recipes,
-        "date": str(today),
+        "date": str(day),
     }
+
+
+def get_or_create_daily_suggestions(db: Session, force_refresh: bool = False, day: date | None = None) -> dict:
+    """The day's suggestions, generating them at most once across concurrent callers and workers."""
+    day = day or date.today()
+    requested_at = datetime.utcnow()
+
+    if not force_refresh:
+        existing = _load_existing(db, day)
+        if existing:
+            return existing
+
+    with single_flight(f"daily_suggestions:{day}", GENERATION_LEASE_SECONDS, GENERATION_LEASE_SECONDS):
+        # End the read transaction so we see what the previous lease holder committed
+        db.rollback()
+        # A refresh is satisfied by any generation that finished after it was requested
+        existing = _load_existing(db, day, created_after=requested_at if force_refresh else None)
+        if existing:
+            return existing
+        try:
+            return _generate(db, day)
+        except IntegrityError:
+            # A worker without the lease (e.g. an older deployment) inserted the day first
+            db.rollback()
+            existing = _load_existing(db, day)
+            if existing is None:
+                raise
+            return existing
+
+
+def _ensure_suggestions(day: date) -> None:
+    db = SessionLocal()
+    try:
+        get_or_create_daily_suggestions(db, day=day)
+    finally:
+        db.close()
+
+
+async def run_suggestion_scheduler() -> None:
+    """Keep today's suggestions generated, and tomorrow's once midnight is within the lead time.
+
+    Every worker runs this loop; the single-flight lease makes only one of them generate.
+    """
+    interval = settings.suggestions_scheduler_interval_seconds
+    lead = timedelta(hours=settings.suggestions_pregenerate_lead_hours)
+    while True:
+        now = datetime.now()
+        days = [now.date()]
+        tomorrow = now.date() + timedelta(days=1)
+        if datetime.combine(tomorrow, datetime.min.time()) - now <= lead:
+            days.append(tomorrow)
+        for day in days:
+            try:
+                await run_in_threadpool(_ensure_suggestions, day)
+            except Exception as e:
+                logger.warning("Pre-generating daily suggestions for %s failed: %s", day, e)
+        await asyncio.sleep(interval)
@@ -0,0 +1,83 @@
+import re
+from bisect import bisect_left, bisect_right
+
+# Rough English average for Claude's tokenizer; good enough to size requests
+CHARS_PER_TOKEN = 4
+
+# Lines that usually start a new recipe: markdown/underlined headings, separators,
+# "Recipe:" labels and short title-like lines
+_SEPARATOR_RE = re.compile(r"^\s*(?:[-=*_#~]{3,}|\f)\s*$")
+_HEADING_RE = re.compile(r"^\s*(?:#{1,3}\s+\S|recipe\s*(?:\d+\s*)?[:.#-])", re.IGNORECASE)
+_SECTION_RE = re.compile(r"^\s*(?:ingredients|directions|instructions|method)\s*:?\s*$", re.IGNORECASE)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _line_starts(text: str) -> list[int]:
+    return [0] + [m.end() for m in re.finditer(r"\n", text)]
+
+
+def _boundaries(text: str) -> tuple[list[int], list[int]]:
+    """Offsets where a recipe probably starts, and offsets of every paragraph start."""
+    lines = text.split("\n")
+    starts = _line_starts(text)
+    strong, paragraphs = [], []
+    for i, line in enumerate(lines):
+        if i == 0 or lines[i - 1].strip():
+            continue
+        if not line.strip():
+            continue
+        paragraphs.append(starts[i])
+        if _HEADING_RE.match(line) or (i > 1 and _SEPARATOR_RE.match(lines[i - 2])):
+            strong.append(starts[i])
+            continue
+        # A short title line with an "Ingredients" header within the next few lines
+        upcoming = [l for l in lines[i + 1:i + 5] if l.strip()]
+        if len(line.strip()) <= 80 and any(_SECTION_RE.match(l) for l in upcoming[:3]):
+            strong.append(starts[i])
+    return strong, paragraphs
+
+
+def chunk_text(text: str, max_tokens: int, overlap_tokens: int) -> list[str]:
+    """Split text into chunks of at most max_tokens, cutting at recipe boundaries where possible.
+
+    Each chunk after the first re-reads overlap_tokens of the previous one, starting at
+    a line boundary, so a recipe cut at a fallback boundary still appears whole once.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return [text]
+    overlap_chars = overlap_tokens * CHARS_PER_TOKEN
+    strong, paragraphs = _boundaries(text)
+    line_starts = _line_starts(text)
+
+    strong_set = set(strong)
+
+    def last_before(offsets: list[int], lo: int, hi: int) -> int | None:
+        i = bisect_right(offsets, hi) - 1
+        return offsets[i] if i >= 0 and offsets[i] > lo else None
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        limit = start + max_chars
+        if limit >= len(text):
+            chunks.append(text[start:])
+            break
+        # Prefer a recipe boundary in the back half, then any paragraph, then any line
+        half = start + max_chars // 2
+        cut = (
+            last_before(strong, half, limit)
+            or last_before(paragraphs, half, limit)
+            or last_before(line_starts, half, limit)
+            or limit
+        )
+        chunks.append(text[start:cut])
+        next_start = cut
+        if cut not in strong_set:
+            i = bisect_left(line_starts, cut - overlap_chars)
+            next_start = line_starts[i] if i < len(line_starts) else cut
+        start = next_start if next_start > start else cut
+    return chunks
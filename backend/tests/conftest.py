@@ -0,0 +1,78 @@
+"""Shared fixtures. The app runs against a throwaway SQLite file, never data/recipes.db."""
+
+import os
+import tempfile
+from pathlib import Path
+
+# Settings are read at import time, so these must be set before anything imports app
+_tmp_dir = Path(tempfile.mkdtemp(prefix="recipe-finder-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_dir / 'test.db'}"
+os.environ["ANTHROPIC_API_KEY"] = ""
+os.environ["SUGGESTIONS_PREGENERATE"] = "false"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.migrations import run_migrations
+from app.services.search_service import ensure_search_index
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    # The same setup the lifespan does, without starting the job queue and schedulers
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    ensure_search_index(engine)
+    yield
+    engine.dispose()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        for table in reversed(Base.metadata.sorted_tables):
+            session.execute(table.delete())
+        session.commit()
+        session.close()
+
+
+@pytest.fixture
+def data_dirs(tmp_path, monkeypatch):
+    """Point image storage and job inputs at tmp_path instead of data/."""
+    from app.services import image_store, image_variants, job_queue, paprika_service
+
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    for module in (image_store, image_variants, paprika_service):
+        monkeypatch.setattr(module, "UPLOADS_DIR", uploads)
+    for module in (image_store, image_variants):
+        monkeypatch.setattr(module, "VARIANTS_DIR", uploads / "variants")
+    monkeypatch.setattr(job_queue, "JOBS_DIR", tmp_path / "jobs")
+    return tmp_path
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def count_statements():
+    """Yield a list that collects every SQL statement the engine executes."""
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
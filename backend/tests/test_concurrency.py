@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from sqlalchemy import text
+
+from app.database import SessionLocal, engine
+from app.main import app
+from app.models import Recipe
+from app.routers import ingredients
+from app.services import http_client, import_service
+
+CLAUDE_LATENCY = 0.5
+PARALLEL_REQUESTS = 4
+
+
+def _stub_generation(monkeypatch) -> None:
+    async def slow_generate(ingredient_list, preferences, count):
+        await asyncio.sleep(CLAUDE_LATENCY)
+        return [
+            {"name": f"{' '.join(ingredient_list)} dish {i}", "ingredients": "1 cup rice", "directions": "Cook."}
+            for i in range(count)
+        ]
+
+    monkeypatch.setattr(ingredients, "generate_recipes", slow_generate)
+    monkeypatch.setattr(ingredients, "schedule_image_fetches", lambda recipes: None)
+
+
+def test_parallel_generate_and_list_requests_overlap(db, monkeypatch):
+    _stub_generation(monkeypatch)
+
+    async def run() -> list[httpx.Response]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            generate = [
+                client.post(
+                    "/api/recipes/generate",
+                    json={"ingredients": [f"ingredient{i}"], "count": 2, "bypass_cache": True},
+                )
+                for i in range(PARALLEL_REQUESTS)
+            ]
+            listing = [client.get(f"/api/recipes/all?per_page={n}") for n in range(1, PARALLEL_REQUESTS + 1)]
+            return await asyncio.gather(*generate, *listing)
+
+    started = time.perf_counter()
+    responses = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+
+    assert [r.status_code for r in responses] == [200] * len(responses)
+    assert db.query(Recipe).count() == PARALLEL_REQUESTS * 2
+    # Serialized, the generate calls alone would take PARALLEL_REQUESTS * CLAUDE_LATENCY
+    assert elapsed < 2 * CLAUDE_LATENCY
+
+
+def _stub_url_import(monkeypatch) -> None:
+    page = "<html><body><h1>Pancakes</h1><p>1 cup flour, 2 eggs. Whisk and fry.</p></body></html>"
+
+    async def slow_get(url, headers=None, timeout=None):
+        await asyncio.sleep(CLAUDE_LATENCY / 5)
+        return httpx.Response(200, text=page, request=httpx.Request("GET", url))
+
+    async def slow_extract(text, source):
+        await asyncio.sleep(CLAUDE_LATENCY)
+        return [{"name": "Pancakes", "ingredients": "1 cup flour\n2 eggs", "directions": "Whisk and fry."}]
+
+    monkeypatch.setattr(http_client.async_client, "get", slow_get)
+    monkeypatch.setattr(import_service, "_extract_chunk", slow_extract)
+    monkeypatch.setattr(import_service, "schedule_image_fetches", lambda recipes, source_image_url=None: None)
+
+
+def test_health_stays_fast_while_an_import_is_in_flight(db, monkeypatch):
+    _stub_url_import(monkeypatch)
+
+    async def run() -> tuple[httpx.Response, list[float]]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            importing = asyncio.create_task(
+                client.post("/api/import/url", json={"url": "https://example.com/pancakes"})
+            )
+            # Timed including the pause between checks: a blocked loop also delays that
+            # wake-up, so a stall shows up even if no health request was in flight
+            latencies = []
+            while not importing.done():
+                started = time.perf_counter()
+                assert (await client.get("/api/health")).status_code == 200
+                await asyncio.sleep(0.01)
+                latencies.append(time.perf_counter() - started)
+            return await importing, latencies
+
+    response, latencies = asyncio.run(run())
+
+    assert response.status_code == 200
+    assert response.json()["imported"] == 1
+    assert len(latencies) > 10
+    assert max(latencies) < CLAUDE_LATENCY / 5
+
+
+def test_concurrent_writers_do_not_hit_database_locked(db):
+    def write(i: int) -> None:
+        session = SessionLocal()
+        try:
+            for j in range(10):
+                session.add(Recipe(name=f"writer {i} recipe {j}", ingredients="1 egg"))
+                session.commit()
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(8)))
+
+    assert db.query(Recipe).count() == 80
+
+
+def test_reads_proceed_while_a_write_transaction_is_open(db):
+    db.add(Recipe(name="existing", ingredients="1 egg"))
+    db.commit()
+
+    holding = threading.Event()
+    release = threading.Event()
+
+    def hold_write_lock() -> None:
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE recipes SET notes = 'locked'"))
+            holding.set()
+            release.wait(5)
+
+    writer = threading.Thread(target=hold_write_lock)
+    writer.start()
+    try:
+        assert holding.wait(5)
+        started = time.perf_counter()
+        reader = SessionLocal()
+        try:
+            assert reader.query(Recipe).count() == 1
+        finally:
+            reader.close()
+        # WAL lets readers see the last commit instead of waiting out the writer
+        assert time.perf_counter() - started < 1
+    finally:
+        release.set()
+        writer.join()
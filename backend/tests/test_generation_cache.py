@@ -0,0 +1,13 @@
+from app.services.generation_cache import generation_key
+
+
+def test_key_ignores_learned_preferences():
+    before = {"top_ingredients": ["rice"], "dietary_preferences": "vegan"}
+    after = {"top_ingredients": ["rice", "tofu"], "top_cuisines": ["Thai"], "dietary_preferences": "vegan"}
+
+    assert generation_key(["Tofu", "rice"], before, 3) == generation_key(["rice", "tofu"], after, 3)
+    assert generation_key(["tofu"], before, 3) != generation_key(["tofu"], {"dietary_preferences": "keto"}, 3)
+
+
+def test_key_depends_on_fan_out():
+    assert generation_key(["tofu"], None, 3, fan_out=True) != generation_key(["tofu"], None, 3, fan_out=False)
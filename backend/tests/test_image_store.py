@@ -0,0 +1,28 @@
+import io
+import stat
+
+from PIL import Image
+
+from app.services.image_store import filename_for, store_bytes
+from app.services.image_variants import create_variants
+
+
+def _png() -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (10, 10), "green").save(buf, "PNG")
+    return buf.getvalue()
+
+
+def test_stored_images_are_world_readable(db, data_dirs):
+    url = store_bytes(_png())
+
+    path = data_dirs / "uploads" / filename_for(url)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o644
+
+
+def test_variants_are_world_readable(db, data_dirs):
+    urls = create_variants(store_bytes(_png()))
+
+    for url in urls.values():
+        path = data_dirs / "uploads" / "variants" / filename_for(url)
+        assert stat.S_IMODE(path.stat().st_mode) == 0o644
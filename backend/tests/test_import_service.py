@@ -0,0 +1,37 @@
+import asyncio
+
+import anthropic
+import pytest
+
+from app.models import ExtractionCacheEntry, Recipe
+from app.services import import_service
+
+
+@pytest.fixture
+def three_chunks(monkeypatch):
+    """Split any text into three chunks; the second one fails to extract."""
+    monkeypatch.setattr(import_service, "chunk_text", lambda text, size, overlap: ["one", "two", "three"])
+
+    async def extract(chunk: str, source: str) -> list[dict]:
+        if chunk == "two":
+            raise anthropic.APIConnectionError(request=None)
+        return [{"name": f"Recipe {chunk}", "ingredients": "1 egg", "directions": "Cook."}]
+
+    monkeypatch.setattr(import_service, "_extract_chunk", extract)
+    monkeypatch.setattr(import_service, "schedule_image_fetches", lambda recipes, source_image_url=None: None)
+
+
+def test_partial_extraction_is_reported(db, three_chunks):
+    result = asyncio.run(import_service.import_from_text(db, "big.md", "long text"))
+
+    assert result["imported"] == 2
+    assert result["failed_chunks"] == 1
+    assert "1 part(s) of the text could not be read" in result["message"]
+    assert db.query(Recipe).count() == 2
+
+
+def test_partial_extraction_is_not_cached(db, three_chunks):
+    recipes, failed_chunks = asyncio.run(import_service._extract_recipes(db, "long text", "big.md"))
+
+    assert (len(recipes), failed_chunks) == (2, 1)
+    assert db.query(ExtractionCacheEntry).count() == 0
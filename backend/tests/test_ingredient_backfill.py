@@ -0,0 +1,15 @@
+from app.models import Recipe, RecipeIngredient
+from app.services.ingredient_service import backfill_recipe_ingredients
+
+
+def test_backfill_does_not_reparse_recipes_without_ingredient_lines(db):
+    db.add_all([Recipe(name="Water", ingredients=""), Recipe(name="Toast", ingredients="2 slices bread")])
+    db.commit()
+    # As if both predate parsing
+    db.query(RecipeIngredient).delete()
+    db.query(Recipe).update({Recipe.ingredients_parsed_at: None})
+    db.commit()
+
+    assert backfill_recipe_ingredients(db) == 2
+    assert db.query(RecipeIngredient).count() == 1
+    assert backfill_recipe_ingredients(db) == 0
@@ -0,0 +1,41 @@
+import asyncio
+
+from app.models import Job, Recipe
+from app.services import job_handlers  # noqa: F401 — registers the job kinds
+from app.services.job_queue import TERMINAL_STATUSES, files_dir, job_queue, new_job_id, submit
+
+from tests.test_paprika_import import sample_photo, paprika_archive
+
+
+def _run_to_completion(job_id: str, db, timeout: float = 20) -> Job:
+    async def run() -> None:
+        job_queue.start(workers=1)
+        try:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            while loop.time() < deadline:
+                db.expire_all()
+                if db.get(Job, job_id).status in TERMINAL_STATUSES:
+                    return
+                await asyncio.sleep(0.05)
+        finally:
+            await job_queue.stop()
+
+    asyncio.run(run())
+    db.expire_all()
+    return db.get(Job, job_id)
+
+
+def test_paprika_job_imports_every_recipe(db, data_dirs):
+    job_id = new_job_id()
+    path = files_dir(job_id) / "import.paprikarecipes"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(paprika_archive(3, photo=sample_photo()))
+
+    submit("paprika_import", {"path": str(path)}, job_id=job_id)
+    job = _run_to_completion(job_id, db)
+
+    assert job.status == "succeeded", job.error
+    assert job.progress_done == 3
+    assert db.query(Recipe).filter(Recipe.image_url.is_not(None)).count() == 3
+    assert not path.parent.exists()
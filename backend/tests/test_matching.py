@@ -0,0 +1,14 @@
+import pytest
+
+
+@pytest.mark.parametrize("body", [{"limit": 0}, {"limit": -1}, {"limit": 101}, {"max_missing": -1}])
+def test_match_rejects_out_of_range_bounds(client, body):
+    response = client.post("/api/recipes/match", json={"ingredients": ["egg"], **body})
+
+    assert response.status_code == 422
+
+
+def test_match_accepts_defaults(db, client):
+    response = client.post("/api/recipes/match", json={"ingredients": ["egg"]})
+
+    assert response.status_code == 200
@@ -0,0 +1,39 @@
+import base64
+import gzip
+import io
+import json
+import zipfile
+
+from PIL import Image
+
+from app.models import ImageBlob, Recipe
+
+
+def sample_photo() -> str:
+    buf = io.BytesIO()
+    Image.new("RGB", (40, 30), "orange").save(buf, "PNG")
+    return base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def paprika_archive(count: int, photo: str | None = None) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for i in range(count):
+            data = {"name": f"Paprika {i}", "ingredients": "1 cup flour", "directions": "Bake.", "photo_data": photo}
+            zf.writestr(f"recipe{i}.paprikarecipe", gzip.compress(json.dumps(data).encode("utf-8")))
+    return buf.getvalue()
+
+
+def test_import_stores_embedded_photos(db, client, data_dirs):
+    # Both recipes share one photo, so the second import reuses the stored blob
+    archive = paprika_archive(2, photo=sample_photo())
+
+    response = client.post("/api/paprika/import", files={"file": ("export.paprikarecipes", archive)})
+
+    assert response.status_code == 200
+    assert response.json()["imported"] == 2
+    urls = {r.image_url for r in db.query(Recipe).all()}
+    assert len(urls) == 1 and None not in urls
+    blob = db.query(ImageBlob).one()
+    assert blob.refcount == 2
+    assert (data_dirs / "uploads" / blob.filename).is_file()
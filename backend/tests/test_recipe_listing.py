@@ -0,0 +1,35 @@
+from app.models import Recipe, SavedRecipe
+
+
+def _seed(db, count: int) -> None:
+    recipes = [Recipe(name=f"Recipe {i}", ingredients="1 cup flour\n2 eggs") for i in range(count)]
+    db.add_all(recipes)
+    db.flush()
+    db.add_all(SavedRecipe(recipe_id=r.id, rating=4) for r in recipes[::2])
+    db.commit()
+
+
+def _statements_for(client, count_statements, path: str) -> int:
+    count_statements.clear()
+    response = client.get(path)
+    assert response.status_code == 200
+    return len(count_statements)
+
+
+def test_listing_runs_constant_statements_regardless_of_page_size(db, client, count_statements):
+    _seed(db, 60)
+
+    small = _statements_for(client, count_statements, "/api/recipes/all?per_page=5&include_total=false")
+    large = _statements_for(client, count_statements, "/api/recipes/all?per_page=50&include_total=false")
+
+    # One page query plus one saved/rating lookup, however many recipes are on the page
+    assert small == large == 2
+
+
+def test_saved_listing_runs_constant_statements_regardless_of_page_size(db, client, count_statements):
+    _seed(db, 60)
+
+    small = _statements_for(client, count_statements, "/api/recipes?per_page=5&include_total=false")
+    large = _statements_for(client, count_statements, "/api/recipes?per_page=50&include_total=false")
+
+    assert small == large
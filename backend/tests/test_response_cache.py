@@ -0,0 +1,17 @@
+import pytest
+
+from app.services.response_cache import CACHEABLE_PATHS
+
+
+def _cacheable(path: str) -> bool:
+    return any(p.match(path) for p in CACHEABLE_PATHS)
+
+
+@pytest.mark.parametrize("path", ["/api/recipes/3f1c9a2e-8d4b-4f6a-9c1e-2b7d5e8f0a13", "/api/recipes/all"])
+def test_recipe_reads_are_cacheable(path):
+    assert _cacheable(path)
+
+
+@pytest.mark.parametrize("path", ["/api/recipes/images", "/api/recipes/images/events"])
+def test_image_polling_is_not_cacheable(path):
+    assert not _cacheable(path)
@@ -6,6 +6,7 @@ import type {
   ImportResult,
   PaginatedRecipes,
   Recipe,
+  RecipeImage,
   RecipeTab,
   TopIngredient,
 } from "../types";
@@ -148,6 +149,13 @@ export async function importFromFiles(files: File[]): Promise<ImportResult> {
   return res.data;
 }
 
+export async function getRecipeImages(ids: string[]): Promise<RecipeImage[]> {
+  const res = await api.get<RecipeImage[]>("/recipes/images", {
+    params: { ids: ids.join(",") },
+  });
+  return res.data;
+}
+
 export async function backfillImages(): Promise<{ total: number; updated: number; pexels_key_set: boolean; errors: string[] }> {
   const res = await api.post<{ total: number; updated: number; pexels_key_set: boolean; errors: string[] }>("/recipes/backfill-images");
   return res.data;
@@ -71,7 +71,15 @@ export default function RecipeCard({ recipe, onSave, onUnsave, showTabAction }:
       {recipe.image_url && !imgError && (
         <Link to={`/recipe/${recipe.id}`}>
           <img
-            src={recipe.image_url}
+            src={recipe.image_variants?.card ?? recipe.image_url}
+            srcSet={
+              recipe.image_variants
+                ? `${recipe.image_variants.thumb} 320w, ${recipe.image_variants.card} 800w`
+                : undefined
+            }
+            sizes="(min-width: 640px) 400px, 100vw"
+            loading="lazy"
+            decoding="async"
             alt={recipe.name}
             className="h-40 w-full object-cover"
             onError={() => setImgError(true)}
@@ -1,8 +1,9 @@
 import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
 import { ArrowRight, Sparkles } from "lucide-react";
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import {
   generateRecipes,
+  getRecipeImages,
   getTopIngredients,
   saveRecipe,
   unsaveRecipe,
@@ -22,6 +23,33 @@ export default function HomePage() {
     queryFn: () => getTopIngredients(12),
   });
 
+  // Images are fetched in the background after generation; poll until they land
+  const pendingIds = results.filter((r) => r.image_status === "pending").map((r) => r.id);
+  const { data: images } = useQuery({
+    queryKey: ["recipeImages", pendingIds],
+    queryFn: () => getRecipeImages(pendingIds),
+    enabled: pendingIds.length > 0,
+    refetchInterval: 2000,
+  });
+
+  useEffect(() => {
+    if (!images) return;
+    const byId = new Map(images.map((i) => [i.recipe_id, i]));
+    setResults((prev) =>
+      prev.map((r) => {
+        const image = byId.get(r.id);
+        return image && image.image_status !== r.image_status
+          ? {
+              ...r,
+              image_url: image.image_url,
+              image_status: image.image_status,
+              image_variants: image.image_variants,
+            }
+          : r;
+      })
+    );
+  }, [images]);
+
   const generate = useMutation({
     mutationFn: generateRecipes,
     onSuccess: (data) => {
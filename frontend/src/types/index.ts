@@ -19,6 +19,16 @@ export interface Recipe {
   created_at: string;
   is_saved: boolean;
   rating: number | null;
+  snippet?: string | null;
+  image_status?: string | null;
+  image_variants?: Record<string, string> | null;
+}
+
+export interface RecipeImage {
+  recipe_id: string;
+  image_url: string | null;
+  image_status: string | null;
+  image_variants: Record<string, string> | null;
 }
 
 export interface GenerateRequest {
@@ -48,6 +58,7 @@ export interface PaginatedRecipes {
   total: number;
   page: number;
   per_page: number;
+  next_cursor?: string | null;
 }
 
 export interface ImportResult {